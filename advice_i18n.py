@@ -0,0 +1,232 @@
+import sys
+import threading
+from functools import lru_cache
+from string import Formatter
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+DEFAULT_LANGUAGE = "English"
+LANGUAGE_CODES = {"en": "English", "hi": "Hindi", "te": "Telugu"}
+
+# Message keys match reco_rules.json; {field} placeholders are farm fields.
+# A key missing from a language falls back to the English template.
+TEMPLATES = {
+    "English": {
+        "advice": {
+            "moderate": (
+                "⚠️ Moderate disease detected. Apply recommended fungicide or bactericide immediately "
+                "and remove heavily infected leaves to prevent spread."
+            ),
+            "mild": "🩺 Mild disease detected. Apply preventive spray and continue monitoring crop health.",
+            "healthy": "✅ Crop health is good. Maintain regular monitoring and nutrition.",
+            "health_unknown": (
+                "❔ Crop health could not be assessed. Inspect the leaves in the field or upload a clearer leaf image."
+            ),
+            "humid_rain": (
+                "🌧️ High humidity and rainfall increase disease risk. Avoid irrigation and apply protective fungicide."
+            ),
+            "heat": "🌡️ High temperature detected. Avoid spraying during midday; spray early morning or evening.",
+            "no_weather": "⚠️ Weather data unavailable. Advice based on crop and market conditions only.",
+            "weeds": (
+                "🌿 High weed infestation detected. Mechanical weeding or selective herbicide application is advised."
+            ),
+            "market": "📈 Market insight: {market_recommendation}",
+        },
+        "decision": {
+            "weather": (
+                "The current weather shows a temperature of {temperature}°C "
+                "with {humidity}% humidity and {description} conditions."
+            ),
+            "rain": "Rainfall increases the risk of disease spread and post-harvest losses.",
+            "dry": "Dry weather conditions are favorable for crop protection and harvesting activities.",
+            "mild": "Since the disease level is mild, timely preventive treatment can restore crop health.",
+            "moderate": "Due to moderate disease severity, immediate treatment is critical before harvest.",
+            "healthy": "The crop is healthy, which supports better yield and market quality.",
+            "health_unknown": (
+                "Crop health could not be assessed, so treatment needs should be confirmed by a field inspection."
+            ),
+            "weeds": "Weed pressure is high and should be controlled to avoid yield reduction.",
+            "wait": "Market trends indicate rising prices, so delaying harvest may increase profitability.",
+            "sell": "Market prices may decline, so early harvest and selling is advisable.",
+            "market_unknown": "Market data is unavailable, so harvest timing should be decided from local mandi prices.",
+        },
+    },
+
+    "Hindi": {
+        "advice": {
+            "moderate": (
+                "⚠️ मध्यम रोग पाया गया। तुरंत अनुशंसित फफूंदनाशक या जीवाणुनाशक का छिड़काव करें "
+                "और रोग फैलने से रोकने के लिए अधिक संक्रमित पत्तियों को हटा दें।"
+            ),
+            "mild": "🩺 हल्का रोग पाया गया। निवारक छिड़काव करें और फसल के स्वास्थ्य की निगरानी जारी रखें।",
+            "healthy": "✅ फसल का स्वास्थ्य अच्छा है। नियमित निगरानी और पोषण बनाए रखें।",
+            "health_unknown": (
+                "❔ फसल के स्वास्थ्य का आकलन नहीं हो सका। खेत में पत्तियों की जाँच करें या पत्ती की साफ़ तस्वीर फिर से अपलोड करें।"
+            ),
+            "humid_rain": (
+                "🌧️ अधिक नमी और बारिश से रोग का खतरा बढ़ता है। सिंचाई न करें और सुरक्षात्मक फफूंदनाशक का छिड़काव करें।"
+            ),
+            "heat": "🌡️ तापमान अधिक है। दोपहर में छिड़काव न करें; सुबह जल्दी या शाम को छिड़काव करें।",
+            "no_weather": "⚠️ मौसम की जानकारी उपलब्ध नहीं है। सलाह केवल फसल और बाज़ार की स्थिति पर आधारित है।",
+            "weeds": (
+                "🌿 खरपतवार का अधिक प्रकोप पाया गया। यांत्रिक निराई या चयनात्मक खरपतवारनाशक के प्रयोग की सलाह दी जाती है।"
+            ),
+            "market": "📈 बाज़ार जानकारी: {market_recommendation}",
+        },
+        "decision": {
+            "weather": "वर्तमान मौसम: तापमान {temperature}°C, नमी {humidity}%, स्थिति {description}।",
+            "rain": "बारिश से रोग फैलने और कटाई के बाद के नुकसान का खतरा बढ़ता है।",
+            "dry": "सूखा मौसम फसल सुरक्षा और कटाई के कार्यों के लिए अनुकूल है।",
+            "mild": "रोग का स्तर हल्का है, इसलिए समय पर निवारक उपचार से फसल फिर से स्वस्थ हो सकती है।",
+            "moderate": "रोग की गंभीरता मध्यम है, इसलिए कटाई से पहले तुरंत उपचार आवश्यक है।",
+            "healthy": "फसल स्वस्थ है, जिससे बेहतर उपज और बाज़ार गुणवत्ता मिलती है।",
+            "health_unknown": "फसल के स्वास्थ्य का आकलन नहीं हो सका, इसलिए उपचार की आवश्यकता खेत में जाँच करके तय करें।",
+            "weeds": "खरपतवार का दबाव अधिक है; उपज में कमी से बचने के लिए इसे नियंत्रित करें।",
+            "wait": "बाज़ार के रुझान कीमतें बढ़ने का संकेत देते हैं, इसलिए कटाई में देरी से लाभ बढ़ सकता है।",
+            "sell": "बाज़ार कीमतें गिर सकती हैं, इसलिए जल्दी कटाई और बिक्री करना उचित है।",
+            "market_unknown": "बाज़ार की जानकारी उपलब्ध नहीं है, इसलिए कटाई का समय स्थानीय मंडी भाव देखकर तय करें।",
+        },
+    },
+
+    "Telugu": {
+        "advice": {
+            "moderate": (
+                "⚠️ మధ్యస్థ స్థాయి వ్యాధి గుర్తించబడింది. సిఫార్సు చేసిన శిలీంద్రనాశిని లేదా బ్యాక్టీరియానాశిని "
+                "వెంటనే పిచికారీ చేయండి, వ్యాధి వ్యాపించకుండా తీవ్రంగా సోకిన ఆకులను తొలగించండి."
+            ),
+            "mild": "🩺 స్వల్ప వ్యాధి గుర్తించబడింది. నివారణ పిచికారీ చేసి, పంట ఆరోగ్యాన్ని గమనిస్తూ ఉండండి.",
+            "healthy": "✅ పంట ఆరోగ్యం బాగుంది. క్రమం తప్పకుండా పర్యవేక్షణ మరియు పోషణ కొనసాగించండి.",
+            "health_unknown": (
+                "❔ పంట ఆరోగ్యాన్ని అంచనా వేయలేకపోయాము. పొలంలో ఆకులను పరిశీలించండి లేదా ఆకు యొక్క స్పష్టమైన చిత్రాన్ని మళ్లీ అప్‌లోడ్ చేయండి."
+            ),
+            "humid_rain": (
+                "🌧️ అధిక తేమ మరియు వర్షం వల్ల వ్యాధి ప్రమాదం పెరుగుతుంది. నీటిపారుదల ఆపి, రక్షణాత్మక శిలీంద్రనాశిని పిచికారీ చేయండి."
+            ),
+            "heat": "🌡️ అధిక ఉష్ణోగ్రత నమోదైంది. మధ్యాహ్నం పిచికారీ చేయవద్దు; ఉదయం లేదా సాయంత్రం పిచికారీ చేయండి.",
+            "no_weather": "⚠️ వాతావరణ సమాచారం అందుబాటులో లేదు. సలహా పంట మరియు మార్కెట్ పరిస్థితుల ఆధారంగా మాత్రమే.",
+            "weeds": (
+                "🌿 కలుపు మొక్కల బెడద ఎక్కువగా ఉంది. యాంత్రిక కలుపు తీయడం లేదా ఎంపిక చేసిన కలుపు నాశిని వాడకం సూచించబడింది."
+            ),
+            "market": "📈 మార్కెట్ సమాచారం: {market_recommendation}",
+        },
+        "decision": {
+            "weather": "ప్రస్తుత వాతావరణం: ఉష్ణోగ్రత {temperature}°C, తేమ {humidity}%, పరిస్థితి {description}.",
+            "rain": "వర్షం వల్ల వ్యాధి వ్యాప్తి మరియు కోత అనంతర నష్టాల ప్రమాదం పెరుగుతుంది.",
+            "dry": "పొడి వాతావరణం పంట రక్షణ మరియు కోత పనులకు అనుకూలంగా ఉంది.",
+            "mild": "వ్యాధి స్థాయి స్వల్పంగా ఉన్నందున, సకాలంలో నివారణ చికిత్సతో పంట ఆరోగ్యాన్ని పునరుద్ధరించవచ్చు.",
+            "moderate": "వ్యాధి తీవ్రత మధ్యస్థంగా ఉన్నందున, కోతకు ముందే తక్షణ చికిత్స అత్యవసరం.",
+            "healthy": "పంట ఆరోగ్యంగా ఉంది, ఇది మెరుగైన దిగుబడి మరియు మార్కెట్ నాణ్యతకు తోడ్పడుతుంది.",
+            "health_unknown": "పంట ఆరోగ్యాన్ని అంచనా వేయలేకపోయినందున, చికిత్స అవసరాన్ని పొలంలో పరిశీలించి నిర్ణయించండి.",
+            "weeds": "కలుపు ఒత్తిడి ఎక్కువగా ఉంది; దిగుబడి తగ్గకుండా దాన్ని నియంత్రించాలి.",
+            "wait": "మార్కెట్ ధోరణులు ధరలు పెరుగుతాయని సూచిస్తున్నాయి, కాబట్టి కోత ఆలస్యం చేస్తే లాభం పెరగవచ్చు.",
+            "sell": "మార్కెట్ ధరలు తగ్గవచ్చు, కాబట్టి త్వరగా కోసి అమ్మడం మంచిది.",
+            "market_unknown": "మార్కెట్ సమాచారం అందుబాటులో లేదు, కాబట్టి కోత సమయాన్ని స్థానిక మండీ ధరల ఆధారంగా నిర్ణయించండి.",
+        },
+    },
+}
+
+LANGUAGES = tuple(TEMPLATES)
+
+
+# -------------------------------------------------
+# COMPILED TEMPLATES
+# -------------------------------------------------
+class Template:
+    """
+    An advice template parsed once: interned literal chunks and the
+    farm fields between them. Static templates render to themselves.
+    """
+
+    __slots__ = ("text", "parts", "fields")
+
+    def __init__(self, text):
+        self.text = sys.intern(text)
+        self.parts = tuple(
+            (sys.intern(literal), field, spec)
+            for literal, field, spec, _ in Formatter().parse(text)
+        )
+        self.fields = tuple(field for _, field, _ in self.parts if field is not None)
+
+    def render(self, values):
+        """Render for one farm (mapping of field values); memoized."""
+        if not self.fields:
+            return self.text
+        # Keyed on (type, value): 30, 30.0 and True hash and compare equal
+        # but format differently ("30" vs "30.0" vs "True")
+        args = tuple((type(v), v) for v in map(values.get, self.fields))
+        try:
+            return _render(self, args)
+        except TypeError:  # unhashable field value
+            return _render.__wrapped__(self, args)
+
+    def render_column(self, frame):
+        """Render for every row of a farm roster; returns a list of str."""
+        if not self.fields:
+            return [self.text] * len(frame)
+        out = ""
+        for literal, field, spec in self.parts:
+            out = out + literal
+            if field is not None:
+                out = out + frame[field].map(lambda v, spec=spec: format(v, spec))
+        return out.tolist()
+
+    def __repr__(self):
+        return f"Template({self.text!r})"
+
+
+@lru_cache(maxsize=8192)
+def _render(template, args):
+    values = (value for _, value in args)
+    return "".join(
+        literal + (format(next(values), spec) if field is not None else "")
+        for literal, field, spec in template.parts
+    )
+
+
+_interned = {}
+_compiled = {}
+_lock = threading.Lock()
+
+
+def _intern(text):
+    template = _interned.get(text)
+    if template is None:
+        template = _interned.setdefault(text, Template(text))
+    return template
+
+
+def resolve_language(language):
+    """"Hindi", "hi" or None → a TEMPLATES language name."""
+    if language is None:
+        return DEFAULT_LANGUAGE
+    name = LANGUAGE_CODES.get(str(language).lower(), language)
+    if name not in TEMPLATES:
+        raise ValueError(f"Unsupported language: {language!r}")
+    return name
+
+
+def get_templates(language=DEFAULT_LANGUAGE):
+    """{"advice": {key: Template}, "decision": {...}} for a language, compiled once."""
+    name = resolve_language(language)
+    compiled = _compiled.get(name)
+    if compiled is None:
+        with _lock:
+            compiled = _compiled.get(name)
+            if compiled is None:
+                compiled = {
+                    section: {
+                        key: _intern(text)
+                        for key, text in {
+                            **messages, **TEMPLATES[name].get(section, {})
+                        }.items()
+                    }
+                    for section, messages in TEMPLATES[DEFAULT_LANGUAGE].items()
+                }
+                _compiled[name] = compiled
+    return compiled
+
+
+def render_cache_info():
+    """functools hit/miss counters for memoized template rendering."""
+    return _render.cache_info()
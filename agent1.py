@@ -1,54 +1,128 @@
 
 
 
-from ultralytics import YOLO
-import cv2
 import os
-from typing import Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from model_registry import get_registry
+from result_cache import get_result_cache
+from telemetry import traced
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "best.pt")
 
+# "torch" (ultralytics + best.pt), "onnx" or "onnx-int8" (ONNX Runtime, CPU)
+AGENT1_BACKEND = os.environ.get("AGENT1_BACKEND", "torch")
+
+
+def _load_yolo(path=MODEL_PATH):
+    """Load the YOLO checkpoint (ultralytics is imported here)."""
+    from ultralytics import YOLO
+    return YOLO(path)
+
+
+def _load_backend(path=MODEL_PATH, backend=AGENT1_BACKEND):
+    if backend == "torch":
+        return _load_yolo(path)
+    if backend in ("onnx", "onnx-int8"):
+        from agent1_onnx import load_onnx_classifier
+        return load_onnx_classifier(path, int8=backend == "onnx-int8")
+    raise ValueError(f"Unknown AGENT1_BACKEND: {backend}")
 
-_model = None
 
 def _get_model(path=MODEL_PATH):
-    """Lazy-load and cache YOLO model."""
-    global _model
-    if _model is None:
-        _model = YOLO(path)
-    return _model
+    """Shared classifier from the model registry (loaded on first use)."""
+    return _get_model_with_hash(path)[0]
+
+
+def _get_model_with_hash(path=MODEL_PATH):
+    """(shared classifier, sha256 of the checkpoint it was loaded from)."""
+    return get_registry().get_with_hash(
+        ("agent1", path, AGENT1_BACKEND), lambda: _load_backend(path), path
+    )
+
 
+get_registry().register(
+    ("agent1", MODEL_PATH, AGENT1_BACKEND), _load_backend, MODEL_PATH
+)
 
+
+ImageInput = Union[str, bytes, np.ndarray]
+
+
+@traced("agent1")
 def run_agent1(
-    image_path: str,
+    image_path: ImageInput,
     model_path: str = MODEL_PATH,
-    save_annotated: Optional[str] = None
+    save_annotated: Optional[str] = None,
+    return_annotated: bool = False,
+    tiled: bool = False
 ):
     """
     Field Monitoring Agent
     ----------------------
-    Input : field image path
+    Input : field image path, encoded image bytes or BGR array
     Output: dict for Agent-4
+            (+ "annotated_image" JPEG bytes when return_annotated=True)
+
+    tiled=True classifies overlapping tiles of a large drone / satellite
+    image instead of one downscaled frame (see agent1_tiles); the
+    annotated image is then the weed heatmap overlay.
     """
-    if not image_path or not os.path.exists(image_path):
+    import cv2
+
+    if isinstance(image_path, str) and not os.path.exists(image_path):
         raise FileNotFoundError(f"Image not found: {image_path}")
 
-    model = _get_model(model_path)
-    results = model(image_path)
+    if tiled:
+        from agent1_tiles import run_agent1_tiled
+        return run_agent1_tiled(
+            image_path, model_path,
+            heatmap_path=save_annotated, return_heatmap=return_annotated
+        )
+
+    # Same image bytes + same loaded best.pt → same answer (and annotation)
+    model, model_hash = _get_model_with_hash(model_path)
+    cache = get_result_cache()
+    key = None
+    if not save_annotated:
+        key = cache.key(f"agent1-{AGENT1_BACKEND}", image_path, model_hash)
+        hit = cache.get(key)
+        if hit is not None and (not return_annotated or "annotated_image" in hit):
+            if not return_annotated:
+                hit.pop("annotated_image", None)
+            return hit
+
+    results = model(_decode(image_path), verbose=False)
     r = results[0]
+    output = _summarize(r)
+
+    # Annotated image (for UI)
+    if save_annotated or return_annotated:
+        annotated = r.plot()
+        if save_annotated:
+            cv2.imwrite(save_annotated, annotated)
+        if return_annotated:
+            ok, buf = cv2.imencode(".jpg", annotated)
+            output["annotated_image"] = buf.tobytes() if ok else None
+
+    if key is not None:
+        cache.put(key, output)
+    return output
+
 
+def _summarize(r):
+    """Agent-4 dict for one classification result."""
     # Top prediction
     top_idx = r.probs.top1
     label = r.names[top_idx]
     confidence = float(r.probs.data[top_idx])
 
-    # Save annotated image (for UI)
-    if save_annotated:
-        annotated = r.plot()
-        cv2.imwrite(save_annotated, annotated)
-
     # Smoothed heuristics (better for Agent-4)
     if "weed" in label.lower():
         weed_percentage = int(confidence * 100)
@@ -69,6 +143,76 @@ def run_agent1(
     }
 
 
+def _decode(image):
+    """Path or encoded bytes → BGR array; arrays pass through unchanged."""
+    if isinstance(image, np.ndarray):
+        return image
+
+    import cv2
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        arr = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+        if arr is None:
+            raise ValueError("Could not decode field image bytes")
+        return arr
+    arr = cv2.imread(image)
+    if arr is None:
+        raise FileNotFoundError(f"Image not found: {image}")
+    return arr
+
+
+def field_summary(results: List[dict]):
+    """Field-level aggregates over per-image Agent-1 results."""
+    if not results:
+        return {"images": 0, "mean_weed_percentage": 0.0, "stage_distribution": {}}
+
+    stages = Counter(r["crop_stage"] for r in results)
+    return {
+        "images": len(results),
+        "mean_weed_percentage": round(
+            sum(r["weed_percentage"] for r in results) / len(results), 2
+        ),
+        "stage_distribution": {
+            stage: round(n / len(results), 3) for stage, n in stages.items()
+        },
+    }
+
+
+@traced("agent1.batch")
+def run_agent1_batch(
+    images: Sequence[ImageInput],
+    model_path: str = MODEL_PATH,
+    batch_size: int = 16,
+    prefetch_workers: int = 4
+):
+    """
+    Field Monitoring Agent (batched)
+    --------------------------------
+    Input : list of image paths, encoded bytes or BGR arrays (e.g. drone tiles)
+    Output: {"results": [per-image dict], "field": aggregates}
+
+    Images are decoded in a small thread pool one batch ahead of the
+    model, so decoding overlaps with inference.
+    """
+    model = _get_model(model_path)
+    chunks = [
+        images[i:i + batch_size] for i in range(0, len(images), batch_size)
+    ]
+    results = []
+
+    with ThreadPoolExecutor(max_workers=prefetch_workers) as pool:
+        pending = [pool.submit(_decode, img) for img in chunks[0]] if chunks else []
+        for i in range(len(chunks)):
+            batch = [f.result() for f in pending]
+            if i + 1 < len(chunks):
+                pending = [pool.submit(_decode, img) for img in chunks[i + 1]]
+
+            for r in model(batch, verbose=False):
+                results.append(_summarize(r))
+
+    return {"results": results, "field": field_summary(results)}
+
+
 # ---------- Local test only ----------
 if __name__ == "__main__":
     test_image = r"C:\Users\karth\OneDrive\Desktop\test_field.jpg"
@@ -0,0 +1,200 @@
+import argparse
+import ast
+import os
+
+import numpy as np
+
+from agent1 import MODEL_PATH
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+ONNX_THREADS = int(os.environ.get("ONNX_THREADS", "0"))  # 0 → runtime default
+
+
+def onnx_path(pt_path=MODEL_PATH, int8=False):
+    base, _ = os.path.splitext(pt_path)
+    return f"{base}.int8.onnx" if int8 else f"{base}.onnx"
+
+
+# -------------------------------------------------
+# EXPORT
+# -------------------------------------------------
+def export_onnx(pt_path=MODEL_PATH, int8=False):
+    """
+    Export best.pt to ONNX (and optionally dynamic INT8 quantization).
+    Returns the path of the model to load.
+    """
+    from ultralytics import YOLO
+
+    exported = YOLO(pt_path).export(format="onnx", dynamic=True, simplify=True)
+    fp32_path = onnx_path(pt_path)
+    if os.path.abspath(exported) != os.path.abspath(fp32_path):
+        os.replace(exported, fp32_path)
+
+    if not int8:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = onnx_path(pt_path, int8=True)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+# -------------------------------------------------
+# RUNTIME
+# -------------------------------------------------
+class _Probs:
+    __slots__ = ("data", "top1")
+
+    def __init__(self, data):
+        self.data = data
+        self.top1 = int(np.argmax(data))
+
+
+class OnnxResult:
+    """The part of an ultralytics classify Result that agent1 uses."""
+
+    def __init__(self, image, probs, names):
+        self.orig_img = image
+        self.probs = _Probs(probs)
+        self.names = names
+
+    def plot(self):
+        import cv2
+
+        img = self.orig_img.copy()
+        top5 = np.argsort(self.probs.data)[::-1][:5]
+        for i, idx in enumerate(top5):
+            text = f"{self.names[idx]} {self.probs.data[idx]:.2f}"
+            cv2.putText(img, text, (10, 30 + 30 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.8, (255, 255, 255), 2, cv2.LINE_AA)
+        return img
+
+
+class OnnxClassifier:
+    """
+    CPU ONNX Runtime drop-in for the YOLO classifier: called like
+    `model(images, verbose=False)` and returns OnnxResult objects.
+    """
+
+    def __init__(self, path, threads=ONNX_THREADS):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.imgsz = inp.shape[-1] if isinstance(inp.shape[-1], int) else 224
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        if "imgsz" in meta:
+            self.imgsz = ast.literal_eval(meta["imgsz"])[-1]
+
+    def _preprocess(self, image):
+        """BGR array → CHW float32, as ultralytics classify_transforms."""
+        import cv2
+
+        h, w = image.shape[:2]
+        scale = self.imgsz / min(h, w)
+        resized = cv2.resize(
+            image, (round(w * scale), round(h * scale)),
+            interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR,
+        )
+        rh, rw = resized.shape[:2]
+        top, left = (rh - self.imgsz) // 2, (rw - self.imgsz) // 2
+        crop = resized[top:top + self.imgsz, left:left + self.imgsz, ::-1]
+        return crop.transpose(2, 0, 1).astype(np.float32) / 255.0
+
+    def __call__(self, source, verbose=False):
+        images = source if isinstance(source, list) else [source]
+        batch = np.stack([self._preprocess(img) for img in images])
+        probs = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            OnnxResult(img, p, self.names) for img, p in zip(images, probs)
+        ]
+
+
+def is_stale(path, pt_path=MODEL_PATH):
+    """True if the export is missing or older than the checkpoint."""
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(pt_path)
+
+
+def load_onnx_classifier(pt_path=MODEL_PATH, int8=False):
+    """Load the ONNX model for best.pt, re-exporting if best.pt is newer."""
+    path = onnx_path(pt_path, int8)
+    if is_stale(path, pt_path):
+        path = export_onnx(pt_path, int8)
+    return OnnxClassifier(path)
+
+
+# -------------------------------------------------
+# PARITY CHECK (vs. PyTorch backend)
+# -------------------------------------------------
+def check_parity(images, pt_path=MODEL_PATH, int8=False, prob_tol=0.05):
+    """
+    Run both backends on the same images and compare agent1 outputs.
+    Returns a report dict; "ok" is True when every label and crop stage
+    matches and probabilities differ by at most `prob_tol`.
+    """
+    from agent1 import _decode, _load_yolo, _summarize
+
+    torch_model = _load_yolo(pt_path)
+    onnx_model = load_onnx_classifier(pt_path, int8)
+
+    label_matches, max_prob_diff, mismatches = 0, 0.0, []
+    for image in images:
+        arr = _decode(image)
+        t = torch_model(arr, verbose=False)[0]
+        o = onnx_model(arr)[0]
+
+        diff = float(np.max(np.abs(t.probs.data.cpu().numpy() - o.probs.data)))
+        max_prob_diff = max(max_prob_diff, diff)
+
+        t_out, o_out = _summarize(t), _summarize(o)
+        same = (
+            t_out["field_label"] == o_out["field_label"]
+            and t_out["crop_stage"] == o_out["crop_stage"]
+        )
+        label_matches += same
+        if not same:
+            mismatches.append({"image": str(image), "torch": t_out, "onnx": o_out})
+
+    return {
+        "images": len(images),
+        "label_agreement": label_matches / len(images) if images else 1.0,
+        "max_prob_diff": round(max_prob_diff, 5),
+        "mismatches": mismatches,
+        "ok": not mismatches and max_prob_diff <= prob_tol,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agent-1 ONNX backend tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    exp = sub.add_parser("export", help="export best.pt to ONNX")
+    exp.add_argument("--int8", action="store_true")
+
+    par = sub.add_parser("parity", help="compare ONNX vs PyTorch outputs")
+    par.add_argument("images", nargs="+")
+    par.add_argument("--int8", action="store_true")
+    par.add_argument("--tol", type=float, default=0.05)
+
+    args = parser.parse_args()
+    if args.cmd == "export":
+        print(f"✅ Exported {export_onnx(int8=args.int8)}")
+    else:
+        report = check_parity(args.images, int8=args.int8, prob_tol=args.tol)
+        for k, v in report.items():
+            print(f"{k}: {v}")
+        raise SystemExit(0 if report["ok"] else 1)
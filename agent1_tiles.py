@@ -0,0 +1,266 @@
+import argparse
+import io
+import math
+import os
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from agent1 import MODEL_PATH, ImageInput, _get_model, _summarize, field_summary
+from telemetry import traced
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+TILE_SIZE = 640            # field area per prediction (the classifier resizes tiles to 224px)
+TILE_OVERLAP = 64
+TILE_BATCH_SIZE = 16
+HEATMAP_MAX_SIDE = 1024    # resolution of the weed map / overlay
+# JPEG / PNG are decoded whole (no random access), so they are capped; at
+# most Pillow's own decompression-bomb limit. Larger fields belong in TIFF.
+TILE_MAX_DECODED_PIXELS = int(os.environ.get("TILE_MAX_DECODED_PIXELS", "89478485"))
+
+_TIFF_MAGIC = (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+")
+
+
+# -------------------------------------------------
+# LAZY IMAGE SOURCES (windowed reads)
+# -------------------------------------------------
+def _to_bgr8(a, rgb=True):
+    """Any window (gray / RGBA / 16-bit / float) → contiguous uint8 BGR."""
+    if a.ndim == 2:
+        a = a[..., None]
+    if a.shape[2] == 1:
+        a = np.repeat(a, 3, axis=2)
+    elif a.shape[2] > 3:
+        a = a[..., :3]
+
+    if a.dtype != np.uint8:
+        if np.issubdtype(a.dtype, np.integer):
+            # Full dtype range → 0..255 (signed data too, so no bit shifts)
+            info = np.iinfo(a.dtype)
+            a = ((a.astype(np.float32) - info.min) * (255 / (info.max - info.min))).astype(np.uint8)
+        else:
+            a = (np.clip(a, 0.0, 1.0) * 255).astype(np.uint8)
+    return np.ascontiguousarray(a[..., ::-1] if rgb else a)
+
+
+class _ArraySource:
+    """Windows of an array (BGR ndarray input, or an RGB memmap)."""
+
+    def __init__(self, array, rgb):
+        self.array = array
+        self.rgb = rgb
+        self.height, self.width = array.shape[:2]
+
+    def window(self, y, x, h, w):
+        return _to_bgr8(self.array[y:y + h, x:x + w], self.rgb)
+
+    def preview(self, max_side):
+        step = max(1, math.ceil(max(self.height, self.width) / max_side))
+        return _to_bgr8(self.array[::step, ::step], self.rgb)
+
+
+def _open_tiff(src):
+    """
+    Page 0 as an array that is never fully in RAM: a direct memmap for
+    uncompressed TIFFs, otherwise decoded once into a temporary memmap.
+    """
+    import tifffile
+
+    array = None
+    if isinstance(src, str):
+        try:
+            array = tifffile.memmap(src, mode="r")
+        except ValueError:
+            pass  # compressed / tiled: not directly mappable
+    if array is None:
+        with tifffile.TiffFile(src) as tif:
+            array = tif.pages[0].asarray(out="memmap")
+
+    # Planar (samples, H, W) → (H, W, samples) view
+    if array.ndim == 3 and array.shape[0] in (3, 4) and array.shape[2] not in (3, 4):
+        array = np.moveaxis(array, 0, -1)
+    return _ArraySource(array, rgb=True)
+
+
+def open_source(image: ImageInput):
+    """Path, encoded bytes or BGR array → source with window()/preview()."""
+    if isinstance(image, np.ndarray):
+        return _ArraySource(image, rgb=False)
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        data = bytes(image)
+        if data[:4] in _TIFF_MAGIC:
+            return _open_tiff(io.BytesIO(data))
+        src = io.BytesIO(data)
+    else:
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image not found: {image}")
+        if image.lower().endswith((".tif", ".tiff")):
+            return _open_tiff(image)
+        src = image
+
+    # JPEG / PNG have no random access: check the header size, then decode
+    # once and slice windows
+    from PIL import Image
+
+    limit = min(TILE_MAX_DECODED_PIXELS, Image.MAX_IMAGE_PIXELS or TILE_MAX_DECODED_PIXELS)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            img = Image.open(src)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ValueError(f"Image too large to decode whole ({e}); convert it to a tiled TIFF") from None
+    with img:
+        width, height = img.size
+        if width * height > limit:
+            raise ValueError(
+                f"Image is {width}x{height} ({width * height} pixels), over the "
+                f"{limit} pixel limit for JPEG/PNG; convert it to a tiled TIFF"
+            )
+        return _ArraySource(np.asarray(img.convert("RGB")), rgb=True)
+
+
+# -------------------------------------------------
+# TILING
+# -------------------------------------------------
+def tile_starts(length, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Tile offsets along one axis; the last tile is flush with the edge."""
+    stride = tile_size - overlap
+    if stride <= 0:
+        raise ValueError("overlap must be smaller than tile_size")
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size + 1, stride))
+    if starts[-1] != length - tile_size:
+        starts.append(length - tile_size)
+    return starts
+
+
+def _heatmap(source, weed_map, path=None, encode=False):
+    import cv2
+
+    h, w = weed_map.shape
+    preview = cv2.resize(source.preview(max(h, w)), (w, h), interpolation=cv2.INTER_AREA)
+    levels = np.clip(weed_map * 2.55, 0, 255).astype(np.uint8)
+    colored = cv2.applyColorMap(levels, cv2.COLORMAP_JET)
+    overlay = cv2.addWeighted(preview, 0.55, colored, 0.45, 0)
+
+    if path:
+        cv2.imwrite(path, overlay)
+    if encode:
+        ok, buf = cv2.imencode(".jpg", overlay)
+        return buf.tobytes() if ok else None
+    return None
+
+
+@traced("agent1.tiled")
+def run_agent1_tiled(
+    image: ImageInput,
+    model_path: str = MODEL_PATH,
+    tile_size: int = TILE_SIZE,
+    overlap: int = TILE_OVERLAP,
+    batch_size: int = TILE_BATCH_SIZE,
+    heatmap_path: str = None,
+    return_heatmap: bool = False,
+):
+    """
+    Field Monitoring Agent (tiled, for large drone / satellite images)
+    ------------------------------------------------------------------
+    Input : field image path (TIFF read window by window), encoded bytes
+            or BGR array
+    Output: the run_agent1 keys aggregated over the field, plus
+            "weed_grid" / "stage_grid" (one cell per tile), "tiles" and
+            "field"; "annotated_image" is the heatmap overlay JPEG when
+            return_heatmap=True
+
+    Overlapping tiles stream through the model `batch_size` at a time;
+    the next batch is read while the current one runs, so memory is
+    bounded by two batches of tiles plus the weed map. The field weed
+    percentage is the area-weighted mean, overlaps averaged.
+    """
+    source = open_source(image)
+    height, width = source.height, source.width
+    ys = tile_starts(height, tile_size, overlap)
+    xs = tile_starts(width, tile_size, overlap)
+    th, tw = min(tile_size, height), min(tile_size, width)
+
+    scale = min(1.0, HEATMAP_MAX_SIDE / max(height, width))
+    map_h, map_w = max(1, round(height * scale)), max(1, round(width * scale))
+    weed_sum = np.zeros((map_h, map_w), dtype=np.float32)
+    weed_count = np.zeros((map_h, map_w), dtype=np.float32)
+
+    positions = [(r, c, y, x) for r, y in enumerate(ys) for c, x in enumerate(xs)]
+    chunks = [positions[i:i + batch_size] for i in range(0, len(positions), batch_size)]
+    grid = [[None] * len(xs) for _ in ys]
+
+    def read(chunk):
+        return [source.window(y, x, th, tw) for _, _, y, x in chunk]
+
+    model = _get_model(model_path)
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read, chunks[0])
+        for i, chunk in enumerate(chunks):
+            tiles = pending.result()
+            if i + 1 < len(chunks):
+                pending = reader.submit(read, chunks[i + 1])
+
+            for (r, c, y, x), result in zip(chunk, model(tiles, verbose=False)):
+                cell = _summarize(result)
+                grid[r][c] = cell
+                y0, x0 = int(y * scale), int(x * scale)
+                y1, x1 = math.ceil((y + th) * scale), math.ceil((x + tw) * scale)
+                weed_sum[y0:y1, x0:x1] += cell["weed_percentage"]
+                weed_count[y0:y1, x0:x1] += 1
+            del tiles
+
+    weed_map = weed_sum / np.maximum(weed_count, 1)
+    cells = [cell for row in grid for cell in row]
+    labels = Counter(cell["field_label"] for cell in cells)
+    stages = Counter(cell["crop_stage"] for cell in cells)
+
+    output = {
+        "field_label": labels.most_common(1)[0][0],
+        "confidence": round(sum(cell["confidence"] for cell in cells) / len(cells), 3),
+        "weed_percentage": round(float(weed_map.mean()), 2),
+        "crop_stage": stages.most_common(1)[0][0],
+        "tiles": {
+            "rows": len(ys), "cols": len(xs), "count": len(cells),
+            "tile_size": tile_size, "overlap": overlap,
+            "image_size": [width, height],
+        },
+        "weed_grid": [[cell["weed_percentage"] for cell in row] for row in grid],
+        "stage_grid": [[cell["crop_stage"] for cell in row] for row in grid],
+        "field": field_summary(cells),
+    }
+
+    if heatmap_path or return_heatmap:
+        heatmap = _heatmap(source, weed_map, heatmap_path, encode=return_heatmap)
+        if return_heatmap:
+            output["annotated_image"] = heatmap
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiled Agent-1 over a large field image")
+    parser.add_argument("image")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE)
+    parser.add_argument("--overlap", type=int, default=TILE_OVERLAP)
+    parser.add_argument("--batch", type=int, default=TILE_BATCH_SIZE)
+    parser.add_argument("--heatmap", default=None, help="write the overlay JPEG here")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out = run_agent1_tiled(
+        args.image, tile_size=args.tile, overlap=args.overlap,
+        batch_size=args.batch, heatmap_path=args.heatmap,
+    )
+    elapsed = time.perf_counter() - start
+    tiles = out["tiles"]["count"]
+    print(f"✅ {tiles} tiles in {elapsed:.1f}s ({tiles / elapsed:.1f} tiles/s)")
+    for key in ("field_label", "confidence", "weed_percentage", "crop_stage", "field"):
+        print(f"{key}: {out[key]}")
@@ -3,79 +3,183 @@
 
 import json
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import io
 import os
 
+from model_registry import get_registry
+from result_cache import get_result_cache
+from telemetry import traced
+
 BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 
 
 MODEL_PATH = os.path.join(BASE_PATH, "agent2_model.h5")
 CLASSES_PATH = os.path.join(BASE_PATH, "agent2_classes.json")
 
-_model = None
+# "keras" (agent2_model.h5 via TensorFlow) or "tflite-float32" /
+# "tflite-float16" / "tflite-int8" (TFLite interpreter)
+AGENT2_BACKEND = os.environ.get("AGENT2_BACKEND", "keras")
+
+IMG_SIZE = (224, 224)
+HEALTHY_THRESHOLD = 0.45
+POLICY_LABELS = ("Healthy", "Diseased_mild", "Diseased_moderate")
+
 _class_names = None
 
 
-def _load_resources(model_path=MODEL_PATH, classes_path=CLASSES_PATH):
-    """Lazy-load model and class names."""
-    global _model, _class_names
-    if _model is None:
-        _model = load_model(model_path, compile=False)
+def _load_keras(model_path=MODEL_PATH):
+    """Load the Keras model (TensorFlow is imported here)."""
+    from tensorflow.keras.models import load_model
+    return load_model(model_path, compile=False)
+
+
+def _load_backend(model_path=MODEL_PATH, backend=AGENT2_BACKEND):
+    if backend == "keras":
+        return _load_keras(model_path)
+    if backend.startswith("tflite-"):
+        from agent2_tflite import load_tflite_model
+        return load_tflite_model(model_path, quant=backend.split("-", 1)[1])
+    raise ValueError(f"Unknown AGENT2_BACKEND: {backend}")
+
+
+def _load_class_names(classes_path=CLASSES_PATH):
+    global _class_names
     if _class_names is None:
         with open(classes_path, "r") as f:
             _class_names = json.load(f)
-    return _model, _class_names
+    return _class_names
+
 
+def _get_model_with_hash(model_path=MODEL_PATH):
+    """(shared model, sha256 of the .h5 it was loaded from)."""
+    return get_registry().get_with_hash(
+        ("agent2", model_path, AGENT2_BACKEND),
+        lambda: _load_backend(model_path),
+        model_path,
+    )
 
-def run_agent2(img_path: str):
+
+def _load_resources(model_path=MODEL_PATH, classes_path=CLASSES_PATH):
+    """Shared model (via the model registry) and class names."""
+    return _get_model_with_hash(model_path)[0], _load_class_names(classes_path)
+
+
+get_registry().register(
+    ("agent2", MODEL_PATH, AGENT2_BACKEND), _load_backend, MODEL_PATH
+)
+
+
+@traced("agent2")
+def run_agent2(img_path):
     """
     Crop Health Agent
     -----------------
-    Input : leaf image path
+    Input : leaf image path, encoded image bytes or RGB array
     Output: dict for Agent-4
     """
-    if not img_path or not os.path.exists(img_path):
+    if isinstance(img_path, str) and not os.path.exists(img_path):
         raise FileNotFoundError(f"Leaf image not found: {img_path}")
 
-    model, class_names = _load_resources()
+    # Same leaf bytes + same loaded agent2_model.h5 → same answer
+    model, model_hash = _get_model_with_hash()
+    cache = get_result_cache()
+    key = cache.key(f"agent2-{AGENT2_BACKEND}", img_path, model_hash)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
 
-    img = image.load_img(img_path, target_size=(224, 224))
-    arr = image.img_to_array(img) / 255.0
-    arr = np.expand_dims(arr, axis=0)
-
-    probs = model.predict(arr, verbose=0)[0]
-
-    # Map probabilities
-    prob_map = {
-        class_names[i]: float(probs[i])
-        for i in range(len(class_names))
-    }
-
-    # ---- Smart decision policy ----
-    healthy_prob = prob_map.get("Healthy", 0.0)
-    mild_prob = prob_map.get("Diseased_mild", 0.0)
-    moderate_prob = prob_map.get("Diseased_moderate", 0.0)
-
-    if healthy_prob >= 0.45:
-        label = "Healthy"
-        confidence = healthy_prob
-    elif mild_prob >= moderate_prob:
-        label = "Diseased_mild"
-        confidence = mild_prob
-    else:
-        label = "Diseased_moderate"
-        confidence = moderate_prob
-
-    return {
-        "health_status": label,
-        "confidence": round(confidence, 3),
-        "probabilities": {
-            "Healthy": round(healthy_prob, 3),
-            "Diseased_mild": round(mild_prob, 3),
-            "Diseased_moderate": round(moderate_prob, 3),
+    class_names = _load_class_names()
+
+    arr = np.empty((1, *IMG_SIZE, 3), dtype=np.float32)
+    _load_into(img_path, arr[0])
+
+    probs = model.predict(arr, verbose=0)
+    output = _apply_policy(probs, class_names)[0]
+
+    cache.put(key, output)
+    return output
+
+
+def _apply_policy(probs, class_names):
+    """
+    Smart decision policy, vectorized over an (n, classes) probability
+    matrix. Returns one Agent-4 dict per row.
+    """
+    probs = np.asarray(probs)
+    n = probs.shape[0]
+    index = {name: i for i, name in enumerate(class_names)}
+
+    def column(name):
+        i = index.get(name)
+        return probs[:, i] if i is not None else np.zeros(n, dtype=probs.dtype)
+
+    healthy_prob = column("Healthy")
+    mild_prob = column("Diseased_mild")
+    moderate_prob = column("Diseased_moderate")
+
+    # 0 = Healthy, 1 = Diseased_mild, 2 = Diseased_moderate
+    choice = np.where(
+        healthy_prob >= HEALTHY_THRESHOLD, 0,
+        np.where(mild_prob >= moderate_prob, 1, 2)
+    )
+    confidence = np.choose(choice, [healthy_prob, mild_prob, moderate_prob])
+
+    return [
+        {
+            "health_status": POLICY_LABELS[choice[i]],
+            "confidence": round(float(confidence[i]), 3),
+            "probabilities": {
+                "Healthy": round(float(healthy_prob[i]), 3),
+                "Diseased_mild": round(float(mild_prob[i]), 3),
+                "Diseased_moderate": round(float(moderate_prob[i]), 3),
+            }
         }
-    }
+        for i in range(n)
+    ]
+
+
+def _load_into(img_path, out):
+    """Decode + resize one leaf image straight into a buffer slot."""
+    if isinstance(img_path, np.ndarray):
+        img = Image.fromarray(img_path.astype(np.uint8)).convert("RGB")
+    elif isinstance(img_path, (bytes, bytearray, memoryview)):
+        img = Image.open(io.BytesIO(img_path)).convert("RGB")
+    else:
+        img = Image.open(img_path).convert("RGB")
+    if img.size != IMG_SIZE:
+        # Same nearest-neighbour resize as keras load_img
+        img = img.resize(IMG_SIZE, Image.NEAREST)
+    np.divide(np.asarray(img, dtype=np.float32), 255.0, out=out)
+
+
+@traced("agent2.batch")
+def run_agent2_batch(img_paths, batch_size: int = 32, workers: int = 4):
+    """
+    Crop Health Agent (batched)
+    ---------------------------
+    Input : list of leaf image paths, encoded bytes or RGB arrays
+    Output: list of Agent-4 dicts, same order as the input
+
+    Images are decoded in a thread pool into one preallocated float32
+    buffer and each chunk goes through a single model call.
+    """
+    model, class_names = _load_resources()
+    n = len(img_paths)
+    if n == 0:
+        return []
+
+    buf = np.empty((min(batch_size, n), *IMG_SIZE, 3), dtype=np.float32)
+    probs = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, n, batch_size):
+            chunk = img_paths[start:start + batch_size]
+            list(pool.map(_load_into, chunk, buf[:len(chunk)]))
+            probs.append(np.asarray(model.predict_on_batch(buf[:len(chunk)])))
+
+    return _apply_policy(np.concatenate(probs), class_names)
 
 
 # -----------------------------
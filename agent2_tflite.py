@@ -0,0 +1,201 @@
+import argparse
+import os
+import threading
+
+import numpy as np
+
+from agent2 import IMG_SIZE, MODEL_PATH
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", "0")) or None
+QUANT_MODES = ("float32", "float16", "int8")
+
+
+def tflite_path(h5_path=MODEL_PATH, quant="float16"):
+    base, _ = os.path.splitext(h5_path)
+    return f"{base}.{quant}.tflite"
+
+
+# -------------------------------------------------
+# CONVERSION
+# -------------------------------------------------
+def _representative_data(images):
+    from agent2 import _load_into
+
+    def gen():
+        buf = np.empty((1, *IMG_SIZE, 3), dtype=np.float32)
+        for image in images:
+            _load_into(image, buf[0])
+            yield [buf]
+    return gen
+
+
+def convert_tflite(h5_path=MODEL_PATH, quant="float16", calibration_images=None,
+                   keras_model=None):
+    """
+    Convert agent2_model.h5 (or an already loaded `keras_model` of it) to
+    TFLite. quant: "float32", "float16", or "int8" (full integer; needs a
+    few calibration leaf images, otherwise dynamic-range int8 weights).
+    """
+    import tensorflow as tf
+    from agent2 import _load_keras
+
+    if quant not in QUANT_MODES:
+        raise ValueError(f"quant must be one of {QUANT_MODES}")
+
+    if keras_model is None:
+        keras_model = _load_keras(h5_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if quant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if calibration_images:
+            converter.representative_dataset = _representative_data(calibration_images)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.uint8
+            converter.inference_output_type = tf.uint8
+
+    out = tflite_path(h5_path, quant)
+    with open(out, "wb") as f:
+        f.write(converter.convert())
+    return out
+
+
+# -------------------------------------------------
+# RUNTIME
+# -------------------------------------------------
+def _interpreter_class():
+    """tflite_runtime when installed (no TensorFlow import), else tf.lite."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """
+    TFLite interpreter with the two Keras methods agent2 calls:
+    predict(arr, verbose=0) and predict_on_batch(arr).
+    """
+
+    def __init__(self, path, threads=TFLITE_THREADS):
+        self.interpreter = _interpreter_class()(model_path=path, num_threads=threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, n):
+        if n != self._batch:
+            self.interpreter.resize_tensor_input(
+                self._input["index"], [n, *IMG_SIZE, 3]
+            )
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch = n
+
+    def predict_on_batch(self, arr):
+        arr = np.asarray(arr, dtype=np.float32)
+        with self._lock:
+            self._resize(arr.shape[0])
+
+            dtype = self._input["dtype"]
+            if dtype != np.float32:
+                scale, zero = self._input["quantization"]
+                arr = np.clip(np.round(arr / scale + zero),
+                              np.iinfo(dtype).min, np.iinfo(dtype).max).astype(dtype)
+
+            self.interpreter.set_tensor(self._input["index"], arr)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"]).copy()
+
+            if self._output["dtype"] != np.float32:
+                scale, zero = self._output["quantization"]
+                out = (out.astype(np.float32) - zero) * scale
+        return out
+
+    def predict(self, arr, verbose=0):
+        return self.predict_on_batch(arr)
+
+
+def is_stale(path, h5_path=MODEL_PATH):
+    """True if the conversion is missing or older than the .h5."""
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(h5_path)
+
+
+def load_tflite_model(h5_path=MODEL_PATH, quant="float16", keras_model=None):
+    """Load the TFLite model for the .h5, reconverting if the .h5 is newer."""
+    path = tflite_path(h5_path, quant)
+    if is_stale(path, h5_path):
+        path = convert_tflite(h5_path, quant, keras_model=keras_model)
+    return TFLiteModel(path)
+
+
+# -------------------------------------------------
+# PARITY CHECK (vs. Keras probabilities)
+# -------------------------------------------------
+def check_parity(images, h5_path=MODEL_PATH, quant="float16", prob_tol=0.02):
+    """
+    Compare TFLite and Keras probabilities on the same leaf images.
+    "ok" is True when every health_status matches and no probability
+    differs by more than `prob_tol`.
+    """
+    from agent2 import _apply_policy, _load_class_names, _load_into, _load_keras
+
+    class_names = _load_class_names()
+    buf = np.empty((len(images), *IMG_SIZE, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        _load_into(image, buf[i])
+
+    keras_model = _load_keras(h5_path)  # loaded once: reference and conversion source
+    keras_probs = np.asarray(keras_model.predict_on_batch(buf))
+    lite_probs = load_tflite_model(h5_path, quant, keras_model).predict_on_batch(buf)
+
+    keras_out = _apply_policy(keras_probs, class_names)
+    lite_out = _apply_policy(lite_probs, class_names)
+    mismatches = [
+        {"image": str(img), "keras": k, "tflite": t}
+        for img, k, t in zip(images, keras_out, lite_out)
+        if k["health_status"] != t["health_status"]
+    ]
+    max_diff = float(np.max(np.abs(keras_probs - lite_probs))) if len(images) else 0.0
+
+    return {
+        "images": len(images),
+        "quant": quant,
+        "max_prob_diff": round(max_diff, 5),
+        "mismatches": mismatches,
+        "ok": not mismatches and max_diff <= prob_tol,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agent-2 TFLite backend tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    conv = sub.add_parser("convert", help="convert agent2_model.h5 to TFLite")
+    conv.add_argument("--quant", choices=QUANT_MODES, default="float16")
+    conv.add_argument("--calibration", nargs="*", default=None,
+                      help="leaf images for full-integer int8 calibration")
+
+    par = sub.add_parser("parity", help="compare TFLite vs Keras probabilities")
+    par.add_argument("images", nargs="+")
+    par.add_argument("--quant", choices=QUANT_MODES, default="float16")
+    par.add_argument("--tol", type=float, default=0.02)
+
+    args = parser.parse_args()
+    if args.cmd == "convert":
+        out = convert_tflite(quant=args.quant, calibration_images=args.calibration)
+        print(f"✅ Converted {out} ({os.path.getsize(out) / 1e6:.1f} MB)")
+    else:
+        report = check_parity(args.images, quant=args.quant, prob_tol=args.tol)
+        for k, v in report.items():
+            print(f"{k}: {v}")
+        raise SystemExit(0 if report["ok"] else 1)
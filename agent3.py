@@ -1,30 +1,45 @@
+import hashlib
+import io
+import os
+
 import pandas as pd
-import requests
-from prophet import Prophet
+
+from forecast_cache import forecast_key, get_forecast_cache
+from forecast_engines import choose_engine
+from forecast_table import lookup_forecast
+from mandi_view import get_best_mandi_view
+from market_client import LIVE_MANDI_URL, get_client, run_sync
+from price_store import PriceStore, get_price_store, subscribe
+from price_warehouse import PRICE_DB, latest_rowid, load_delta, load_prices
+from telemetry import span, traced
 
 # -------------------------------------------------
 # CONFIG
 # -------------------------------------------------
-FALLBACK_CSV = r"Daily Price (1).csv"
+FALLBACK_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Daily Price (1).csv")
+FORECAST_DAYS = 7
+LIVE_DEADLINE = 6.0  # seconds for the whole live fetch, retries included
 
 # -------------------------------------------------
 # LIVE MANDI FETCH (BEST-EFFORT)
 # -------------------------------------------------
+@traced("agent3.live_fetch")
 def fetch_live_mandi_prices(crop):
     """
     Attempts to fetch live mandi prices.
     Returns None if unavailable (very common).
+    While the source is known to be down (circuit breaker open) this
+    returns None immediately instead of waiting for the timeout.
     """
     try:
         # NOTE: Most govt sites block scraping.
         # This is a placeholder to show intent.
-        url = "https://example-mandi-api.com/prices"  # dummy
-        params = {"commodity": crop}
-
-        r = requests.get(url, params=params, timeout=5)
-        r.raise_for_status()
+        client = get_client("live_mandi", timeout=5, deadline=LIVE_DEADLINE)
+        data = run_sync(
+            client.get_json(LIVE_MANDI_URL, params={"commodity": crop}),
+            timeout=LIVE_DEADLINE + 1,
+        )
 
-        data = r.json()
         if not data:
             return None
 
@@ -37,9 +52,7 @@ def fetch_live_mandi_prices(crop):
 # -------------------------------------------------
 # FALLBACK DATASET LOGIC
 # -------------------------------------------------
-def load_and_clean_data(csv_path):
-    df = pd.read_csv(csv_path)
-
+def clean_price_frame(df):
     df["Price Date"] = pd.to_datetime(
         df["Price Date"], format="%d-%m-%Y", errors="coerce"
     )
@@ -52,7 +65,85 @@ def load_and_clean_data(csv_path):
     return df
 
 
+@traced("agent3.load_csv")
+def load_and_clean_data(csv_path):
+    return clean_price_frame(pd.read_csv(csv_path))
+
+
+# -------------------------------------------------
+# INCREMENTAL CSV LOADING
+# -------------------------------------------------
+def _csv_cursor(csv_path, size=None):
+    """(byte offset, fingerprint of the bytes just before it)."""
+    size = os.stat(csv_path).st_size if size is None else size
+    with open(csv_path, "rb") as f:
+        f.seek(max(0, size - 256))
+        return size, hashlib.sha1(f.read(size - max(0, size - 256))).hexdigest()
+
+
+def load_csv_delta(csv_path, cursor):
+    """
+    Rows appended to the CSV since `cursor`, plus the new cursor.
+    Returns None when the file was rewritten rather than appended to,
+    which makes the caller fall back to a full reload.
+    """
+    if cursor is None:
+        return None
+    offset, fingerprint = cursor
+    size = os.stat(csv_path).st_size
+    if size < offset or _csv_cursor(csv_path, offset)[1] != fingerprint:
+        return None
+
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        f.seek(offset)
+        tail = f.read(size - offset)
+
+    # Only complete lines; a half-written last line is read next time
+    end = tail.rfind(b"\n") + 1
+    new_cursor = _csv_cursor(csv_path, offset + end) if end else cursor
+    df = pd.read_csv(io.BytesIO(header + tail[:end]))
+    return clean_price_frame(df), new_cursor
+
+
+@traced("agent3.load_prices")
+def load_price_store():
+    """
+    Shared price store: the local price warehouse (filled by ingest.py)
+    when it exists, otherwise the bundled CSV. New rows in either are
+    merged incrementally rather than re-parsing everything.
+    """
+    if os.path.exists(PRICE_DB):
+        return get_price_store(
+            PRICE_DB, loader=load_prices,
+            delta_loader=load_delta, cursor=latest_rowid,
+        )
+    return get_price_store(
+        FALLBACK_CSV, loader=load_and_clean_data,
+        delta_loader=load_csv_delta, cursor=_csv_cursor,
+    )
+
+
+@subscribe
+def _on_prices_changed(store, changed):
+    """
+    Drop cached forecasts of changed series only.
+    Fitted models are kept so the refit can warm-start from them.
+    """
+    cache = get_forecast_cache()
+    for key, market in changed:
+        series = store.series(key, market)
+        if series is None:
+            cache.invalidate(key, market)
+        else:
+            cache.invalidate(key, market, before=series.last_date.strftime("%Y-%m-%d"))
+
+
+@traced("agent3.best_mandi")
 def select_best_mandi(df, crop):
+    if isinstance(df, PriceStore):
+        return get_best_mandi_view(df).best(crop)
+
     crop_df = df[df["Commodity"].str.lower() == crop.lower()]
 
     if crop_df.empty:
@@ -68,39 +159,86 @@ def select_best_mandi(df, crop):
     return best["Market"], best["Modal Price"]
 
 
-def forecast_price(df, crop, mandi):
+def _mandi_history(df, crop, mandi):
+    """Date-sorted ds/y frame for one crop + mandi."""
+    if isinstance(df, PriceStore):
+        series = df.series(crop, mandi)
+        if series is None:
+            return pd.DataFrame(columns=["ds", "y"])
+        return pd.DataFrame({"ds": series.dates, "y": series.prices})
+
     mandi_df = df[
         (df["Commodity"].str.lower() == crop.lower())
         & (df["Market"] == mandi)
     ].sort_values("Price Date")
 
-    if mandi_df.shape[0] < 2:
-        return None, None
-
-    prophet_df = mandi_df.rename(
+    return mandi_df.rename(
         columns={"Price Date": "ds", "Modal Price": "y"}
     )[["ds", "y"]]
 
-    model = Prophet(daily_seasonality=True)
-    model.fit(prophet_df)
 
-    future = model.make_future_dataframe(periods=7)
-    forecast = model.predict(future)
+@traced("agent3.forecast")
+def forecast_price(df, crop, mandi, horizon=FORECAST_DAYS, cache=None, engine=None):
+    prophet_df = _mandi_history(df, crop, mandi)
+
+    if prophet_df.shape[0] < 2:
+        return None, None
+
+    if cache is None:
+        cache = get_forecast_cache()
+    engine = choose_engine(prophet_df.shape[0], engine)
+    key = forecast_key(
+        crop, mandi, prophet_df.iloc[-1]["ds"], horizon, engine.name
+    )
+
+    # Nightly precomputed table first, then the LRU cache, then fit
+    cached = lookup_forecast(key) or cache.get(key)
+    if cached is not None:
+        return cached
 
+    previous = cache.latest_model(crop, mandi) if engine.name == "prophet" else None
+    with span("agent3.fit", engine=engine.name, points=len(prophet_df)):
+        predicted, model = engine.fit_predict(prophet_df, horizon, previous)
     current = prophet_df.iloc[-1]["y"]
-    predicted = forecast.iloc[-7:]["yhat"].mean()
 
+    cache.put(key, current, predicted, model)
     return current, predicted
 
 
 # -------------------------------------------------
 # MAIN AGENT-3 (HYBRID)
 # -------------------------------------------------
-def run_agent3(crop):
+def _optional_price(value):
+    # Min/Max are often blank in the dataset; NaN is not valid JSON
+    return None if pd.isna(value) else float(value)
+
+
+@traced("agent3.top_mandis")
+def _top_mandis(store, crop, k, district, near, radius_km):
+    rows = get_best_mandi_view(store).top_k(crop, k, district, near, radius_km)
+    return [
+        {
+            "mandi": r.market,
+            "district": r.district,
+            "modal_price": round(r.modal_price, 2),
+            "min_price": _optional_price(r.min_price),
+            "max_price": _optional_price(r.max_price),
+            "price_date": r.date.strftime("%Y-%m-%d"),
+        }
+        for r in rows
+    ]
+
+
+@traced("agent3")
+def run_agent3(crop, engine=None, district=None, near=None, radius_km=None, top_k=5):
     """
     Hybrid Agent-3:
     - Try live mandi data
     - If unavailable → fallback to dataset
+    `engine` picks the forecaster ("prophet", "trend" or "auto").
+    `district` or `near`=(lat, lon) + `radius_km` restrict the mandis
+    considered; the best of those (statewide if none match) is forecast
+    and the top `top_k` are listed.
     """
 
     # 1️⃣ TRY LIVE DATA
@@ -117,9 +255,13 @@ def run_agent3(crop):
         }
 
     # 2️⃣ FALLBACK TO DATASET (ALWAYS WORKS)
-    df = load_and_clean_data(FALLBACK_CSV)
-    mandi, today_price = select_best_mandi(df, crop)
-    current, predicted = forecast_price(df, crop, mandi)
+    store = load_price_store()
+    top_mandis = _top_mandis(store, crop, top_k, district, near, radius_km)
+    if top_mandis:
+        mandi, today_price = top_mandis[0]["mandi"], top_mandis[0]["modal_price"]
+    else:
+        mandi, today_price = select_best_mandi(store, crop)
+    current, predicted = forecast_price(store, crop, mandi, engine=engine)
 
     if predicted is None:
         decision = "SELL / WAIT unavailable (insufficient data)"
@@ -135,7 +277,8 @@ def run_agent3(crop):
         "current_price": round(today_price, 2),
         "predicted_price": round(predicted, 2) if predicted != "N/A" else predicted,
         "recommendation": decision,
-        "data_source": "fallback_dataset"
+        "data_source": "fallback_dataset",
+        "top_mandis": top_mandis
     }
 
 
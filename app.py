@@ -1,11 +1,26 @@
 import streamlit as st
-import tempfile
-import os
 
-from agent1 import run_agent1
-from agent2 import run_agent2
-from agent3 import run_agent3
-from reco import recommendation_agent, get_weather
+from inference_server import get_client
+from model_registry import get_registry
+from pipeline import run_pipeline
+from startup import warm_up
+
+
+@st.cache_resource
+def shared_models():
+    """
+    One model registry per server process, shared by all sessions.
+    Preloading starts here, once, at server start rather than per rerun.
+    """
+    if get_client() is not None:
+        # Models are served by the inference worker; only warm prices
+        warm_up(steps=["prices", "prophet"])
+    else:
+        warm_up()
+    return get_registry()
+
+
+shared_models()
 
 def card(title, content, color="#f9f9f9"):
     st.markdown(
@@ -145,40 +160,23 @@ if st.button("🚀 Get Smart Recommendation"):
         st.error("Please enter crop name and city.")
         st.stop()
 
-    # Save uploaded files
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as f1:
-        f1.write(field_image.read())
-        field_path = f1.name
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as f2:
-        f2.write(leaf_image.read())
-        leaf_path = f2.name
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as f3:
-        annotated_path = f3.name
-
-    # Run agents
-    with st.spinner("🔍 Analyzing field condition..."):
-        agent1_output = run_agent1(field_path, save_annotated=annotated_path)
+    # Keep uploads in memory (no temp files)
+    field_bytes = field_image.getvalue()
+    leaf_bytes = leaf_image.getvalue()
 
-    with st.spinner("🧪 Analyzing crop health..."):
-        agent2_output = run_agent2(leaf_path)
-
-    with st.spinner("📈 Analyzing market prices..."):
-        agent3_output = run_agent3(crop_name)
+    # Run agents concurrently
+    with st.spinner("🔍 Analyzing field, crop health, market and weather..."):
+        result = run_pipeline(
+            field_bytes, leaf_bytes, crop_name, city, api_key or None,
+            language=language,
+        )
 
-    with st.spinner("🌦️ Fetching weather..."):
-        weather = get_weather(city, api_key) if api_key else {
-            "source": "unavailable",
-            "rain": False
-        }
+    agent2_output = result["agent2"]
+    annotated_image = result["annotated_image"]
+    final_output = result["final"]
 
-    final_output = recommendation_agent(
-        agent1_output,
-        agent2_output,
-        agent3_output,
-        weather
-    )
+    for agent, error in result["errors"].items():
+        st.warning(f"{agent} unavailable ({error}); showing partial results.")
 
     # ---------------------------
     # DISPLAY RESULTS
@@ -189,7 +187,7 @@ if st.button("🚀 Get Smart Recommendation"):
 
     with colA:
         st.image(
-            annotated_path,
+            annotated_image or field_bytes,
             caption="Field Analysis Output",
             use_container_width=True
         )
@@ -229,10 +227,5 @@ if st.button("🚀 Get Smart Recommendation"):
     "#e6fffa"
 )
 
-
-
-
-    # Cleanup
-    os.remove(field_path)
-    os.remove(leaf_path)
-    os.remove(annotated_path)
+    with st.expander("⏱️ Agent timings"):
+        st.json(result["timings"])
@@ -0,0 +1,329 @@
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRICE_CSV = os.path.join(BASE_DIR, "Daily Price (1).csv")
+SCALES = [10, 100, 1000]
+ITERATIONS = 20            # image / weather / recommendation stages
+PRICE_ITERATIONS = 5       # load_and_clean_data, select_best_mandi per scale
+FORECAST_ITERATIONS = 3    # forecast_price (cold fit) per scale
+STUB_LATENCY_MS = 20       # simulated network latency of the stub servers
+
+
+# -------------------------------------------------
+# STUB SERVERS (weather + live mandi)
+# -------------------------------------------------
+STUB_WEATHER = {
+    "main": {"temp": 31.5, "humidity": 74},
+    "wind": {"speed": 3.2},
+    "weather": [{"description": "light rain"}],
+    "rain": {"1h": 0.4},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    latency = STUB_LATENCY_MS / 1000
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path.endswith("/weather"):
+            body = STUB_WEATHER
+        elif path.endswith("/prices"):
+            body = {}  # "no live data", so Agent-3 uses the dataset
+        else:
+            self.send_error(404)
+            return
+
+        time.sleep(self.latency)
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(latency_ms=STUB_LATENCY_MS):
+    """Local OpenWeather + mandi API stand-in; returns (server, base url)."""
+    handler = type("StubHandler", (_StubHandler,), {"latency": latency_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# -------------------------------------------------
+# SYNTHETIC FIXTURES
+# -------------------------------------------------
+def synthetic_image(seed, size=(1280, 720)):
+    """Field/leaf-like JPEG bytes: green noise with darker patches."""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    w, h = size
+    img = np.empty((h, w, 3), dtype=np.uint8)
+    img[..., 0] = rng.integers(30, 90, (h, w))
+    img[..., 1] = rng.integers(110, 200, (h, w))
+    img[..., 2] = rng.integers(20, 70, (h, w))
+    for _ in range(8):
+        x, y = rng.integers(0, w - w // 8), rng.integers(0, h - h // 8)
+        img[y:y + h // 8, x:x + w // 8] //= 2
+
+    buf = io.BytesIO()
+    Image.fromarray(img).save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def scale_price_csv(factor, out_dir, src=PRICE_CSV):
+    """
+    Copy of the price CSV with `factor`× the rows: each copy renames the
+    markets ("<market> #k"), so the number of series grows while each
+    series keeps its real length.
+    """
+    path = os.path.join(out_dir, f"prices_x{factor}.csv")
+    if os.path.exists(path):
+        return path
+    df = pd.read_csv(src, dtype=str)
+    copies = [df] + [
+        df.assign(Market=df["Market"] + f" #{k}") for k in range(1, factor)
+    ]
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+# -------------------------------------------------
+# MEASUREMENT
+# -------------------------------------------------
+def peak_rss_mb():
+    """High-water resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def current_rss_mb():
+    """Resident set size right now (Linux /proc), or None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def summarize(samples):
+    """Latency percentiles (ms) and throughput for a list of seconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_per_s": round(len(samples) / (ms.sum() / 1000), 3) if ms.sum() else None,
+    }
+
+
+def measure(fn, args_list, check=None):
+    """
+    Time fn(*args) for each args tuple; stats, or the error it raised.
+    `check(result)` may raise to mark a call that returned but failed.
+    "rss_delta_mb" is how much resident memory grew over the stage.
+    """
+    samples = []
+    rss_before = current_rss_mb()
+    try:
+        for args in args_list:
+            start = time.perf_counter()
+            result = fn(*args)
+            samples.append(time.perf_counter() - start)
+            if check is not None:
+                check(result)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "n": len(samples)}
+    stats = summarize(samples)
+    rss_after = current_rss_mb()
+    stats["rss_delta_mb"] = (
+        round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+    )
+    return stats
+
+
+def _no_agent_errors(result):
+    """A pipeline run that fell back for any agent is a failed run."""
+    if result.get("errors"):
+        raise RuntimeError(f"agents fell back: {result['errors']}")
+
+
+def _timed_once(fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        return f"failed: {type(e).__name__}: {e}"
+    return round(time.perf_counter() - start, 3)
+
+
+# -------------------------------------------------
+# BENCHMARK
+# -------------------------------------------------
+def run_benchmarks(scales=SCALES, iterations=ITERATIONS,
+                   price_iterations=PRICE_ITERATIONS,
+                   forecast_iterations=FORECAST_ITERATIONS,
+                   crop=None, stub_latency_ms=STUB_LATENCY_MS, work_dir=None):
+    """
+    Every advisory stage on its own plus the full pipeline (the app.py
+    flow), against local stub servers. Returns a JSON-serializable dict.
+    """
+    server, stub_url = start_stub_server(stub_latency_ms)
+    work_dir = work_dir or tempfile.mkdtemp(prefix="vfm-bench-")
+
+    # Point the app at the stubs before its modules read their config;
+    # disable the precomputed forecast table so forecast_price really fits
+    os.environ["LIVE_MANDI_URL"] = f"{stub_url}/prices"
+    os.environ["FORECAST_TABLE"] = os.path.join(work_dir, "no_forecast_table.csv")
+    os.environ.pop("FORECAST_CACHE_DIR", None)
+
+    from agent3 import forecast_price, load_and_clean_data, select_best_mandi
+    from forecast_cache import ForecastCache
+    from reco import get_weather, recommendation_agent
+    from weather import OpenWeatherBackend, WeatherProvider, set_weather_provider
+
+    set_weather_provider(
+        WeatherProvider(OpenWeatherBackend(url=f"{stub_url}/data/2.5/weather"))
+    )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "iterations": iterations,
+            "scales": list(scales),
+            "stub_latency_ms": stub_latency_ms,
+        },
+        "model_load_s": {},
+        "stages": {},
+    }
+    stages = report["stages"]
+
+    # Model load (cold, once per process)
+    def load_agent1():
+        from agent1 import _get_model
+        _get_model()
+
+    def load_agent2():
+        from agent2 import _load_resources
+        _load_resources()
+
+    report["model_load_s"]["agent1"] = _timed_once(load_agent1)
+    report["model_load_s"]["agent2"] = _timed_once(load_agent2)
+
+    # Distinct images per call so the result cache never answers
+    fields = [synthetic_image(i) for i in range(iterations)]
+    leaves = [synthetic_image(10_000 + i, (256, 256)) for i in range(iterations)]
+
+    from agent1 import run_agent1
+    from agent2 import run_agent2
+    stages["run_agent1"] = measure(run_agent1, [(img,) for img in fields])
+    stages["run_agent2"] = measure(run_agent2, [(img,) for img in leaves])
+
+    # Fresh city per call: the weather cache misses and the stub is hit
+    stages["get_weather"] = measure(
+        get_weather, [(f"Bench City {i}", "bench-key") for i in range(iterations)]
+    )
+
+    agent1_out = {"weed_percentage": 24.5}
+    agent2_out = {"health_status": "Diseased_mild"}
+    agent3_out = {"crop": "Tomato", "best_mandi": "Bowenpally",
+                  "predicted_price": 1510.0, "recommendation": "WAIT – Prices likely to increase"}
+    weather_out = get_weather("Adilabad", "bench-key")
+    stages["recommendation_agent"] = measure(
+        recommendation_agent,
+        [(agent1_out, agent2_out, agent3_out, weather_out)] * (iterations * 50),
+    )
+
+    # Price stages per dataset scale
+    for factor in [1, *scales]:
+        path = PRICE_CSV if factor == 1 else scale_price_csv(factor, work_dir)
+        label = f"x{factor}"
+        stages[f"load_and_clean_data[{label}]"] = measure(
+            load_and_clean_data, [(path,)] * price_iterations
+        )
+        try:
+            df = load_and_clean_data(path)
+        except Exception as e:
+            stages[f"select_best_mandi[{label}]"] = {"error": str(e)}
+            continue
+        crop_name = crop or df["Commodity"].value_counts().idxmax()
+        stages[f"select_best_mandi[{label}]"] = measure(
+            select_best_mandi, [(df, crop_name)] * price_iterations
+        )
+        mandi, _ = select_best_mandi(df, crop_name)
+        # New cache per call: cold fit, no warm start
+        stages[f"forecast_price[{label}]"] = measure(
+            lambda: forecast_price(df, crop_name, mandi, cache=ForecastCache(cache_dir=None)),
+            [()] * forecast_iterations,
+        )
+        del df
+
+    # End to end, as app.py calls it
+    from pipeline import run_pipeline
+    e2e_crop = crop or "Tomato"
+    stages["pipeline"] = measure(
+        run_pipeline,
+        [(fields[i], leaves[i], e2e_crop, f"Pipeline City {i}", "bench-key")
+         for i in range(iterations)],
+        check=_no_agent_errors,
+    )
+
+    server.shutdown()
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the advisory pipeline")
+    parser.add_argument("--scales", nargs="*", type=int, default=SCALES,
+                        help="price CSV scale factors (e.g. 10 100 1000)")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--price-iterations", type=int, default=PRICE_ITERATIONS)
+    parser.add_argument("--forecast-iterations", type=int, default=FORECAST_ITERATIONS)
+    parser.add_argument("--crop", default=None,
+                        help="crop for the price stages (default: most common)")
+    parser.add_argument("--stub-latency-ms", type=float, default=STUB_LATENCY_MS)
+    parser.add_argument("--work-dir", default=None,
+                        help="where scaled CSVs are written (reused if present)")
+    parser.add_argument("--out", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        args.scales, args.iterations, args.price_iterations,
+        args.forecast_iterations, args.crop, args.stub_latency_ms, args.work_dir,
+    )
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✅ Wrote {args.out}")
+    else:
+        print(text)
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", "512"))
+# Fitted models are far larger than forecasts; keep fewer in memory
+FORECAST_MODEL_CACHE_SIZE = int(os.environ.get("FORECAST_MODEL_CACHE_SIZE", "64"))
+FORECAST_CACHE_DIR = os.environ.get("FORECAST_CACHE_DIR")  # None → memory only
+
+
+def forecast_key(crop, mandi, last_date, horizon, engine="prophet"):
+    """Cache key: (crop, mandi, last price date, horizon, engine)."""
+    return (
+        crop.lower(),
+        mandi,
+        pd.Timestamp(last_date).strftime("%Y-%m-%d"),
+        int(horizon),
+        engine,
+    )
+
+
+def _digest(*parts):
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------
+# FORECAST CACHE
+# -------------------------------------------------
+class ForecastCache:
+    """
+    LRU cache of (current, predicted) forecasts plus a smaller LRU of the
+    latest fitted model per series (used to warm-start the next fit).
+
+    A key carries the series' last price date, so new rows for a series
+    produce a new key; storing it drops the older entries of that series
+    only. With `cache_dir` set, forecasts and models are also written to
+    disk and survive restarts.
+    """
+
+    def __init__(self, max_entries=FORECAST_CACHE_SIZE, cache_dir=FORECAST_CACHE_DIR,
+                 max_models=FORECAST_MODEL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.max_models = max_models
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ---------- forecasts ----------
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._read_forecast(key)
+        if value is not None:
+            self._remember(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, current, predicted, model=None):
+        value = (float(current), float(predicted))
+        crop, mandi, last_date = key[:3]
+
+        self.invalidate(crop, mandi, before=last_date)
+        self._remember(key, value)
+        self._write_forecast(key, value)
+
+        if model is not None:
+            self._remember_model(crop, mandi, (last_date, model))
+            self._write_model(crop, mandi, last_date, model)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _remember_model(self, crop, mandi, hit):
+        with self._lock:
+            self._models[(crop, mandi)] = hit
+            self._models.move_to_end((crop, mandi))
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+
+    def invalidate(self, crop, mandi, before=None):
+        """
+        Drop cached forecasts of one series.
+        With `before` (YYYY-MM-DD), only entries older than that date go.
+        """
+        crop = crop.lower()
+        with self._lock:
+            stale = [
+                k for k in self._entries
+                if k[0] == crop and k[1] == mandi
+                and (before is None or k[2] < before)
+            ]
+            for k in stale:
+                del self._entries[k]
+            if before is None:
+                self._models.pop((crop, mandi), None)
+
+        if not self.cache_dir:
+            return
+        for k in stale:
+            self._remove_file(self._forecast_path(k))
+        if before is None:
+            self._remove_file(self._model_path(crop, mandi))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._models.clear()
+
+    # ---------- fitted models (warm start) ----------
+    def latest_model(self, crop, mandi):
+        """Most recent fitted model for a series (reread from disk if evicted), or None."""
+        crop = crop.lower()
+        with self._lock:
+            hit = self._models.get((crop, mandi))
+            if hit is not None:
+                self._models.move_to_end((crop, mandi))
+                return hit[1]
+
+        hit = self._read_model(crop, mandi)
+        if hit is None:
+            return None
+        self._remember_model(crop, mandi, hit)
+        return hit[1]
+
+    # ---------- disk tier ----------
+    def _forecast_path(self, key):
+        return os.path.join(self.cache_dir, f"fc-{_digest(*key)}.json")
+
+    def _model_path(self, crop, mandi):
+        return os.path.join(self.cache_dir, f"model-{_digest(crop, mandi)}.json")
+
+    def _read_forecast(self, key):
+        if not self.cache_dir:
+            return None
+        data = self._read_json(self._forecast_path(key))
+        if data is None or tuple(data.get("key", ())) != key:
+            return None
+        return data["current"], data["predicted"]
+
+    def _write_forecast(self, key, value):
+        if not self.cache_dir:
+            return
+        self._write_json(self._forecast_path(key), {
+            "key": list(key),
+            "current": value[0],
+            "predicted": value[1],
+        })
+
+    def _read_model(self, crop, mandi):
+        if not self.cache_dir:
+            return None
+        data = self._read_json(self._model_path(crop, mandi))
+        if data is None:
+            return None
+        try:
+            from prophet.serialize import model_from_json
+            return data["last_date"], model_from_json(data["model"])
+        except Exception:
+            return None
+
+    def _write_model(self, crop, mandi, last_date, model):
+        if not self.cache_dir:
+            return
+        try:
+            from prophet.serialize import model_to_json
+            payload = model_to_json(model)
+        except Exception:
+            return
+        self._write_json(self._model_path(crop, mandi), {
+            "crop": crop,
+            "mandi": mandi,
+            "last_date": last_date,
+            "model": payload,
+        })
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_cache = None
+
+
+def get_forecast_cache():
+    """Process-wide ForecastCache."""
+    global _cache
+    if _cache is None:
+        _cache = ForecastCache()
+    return _cache
@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+FORECAST_ENGINE = os.environ.get("FORECAST_ENGINE", "auto")
+PROPHET_MIN_POINTS = int(os.environ.get("PROPHET_MIN_POINTS", "30"))
+
+
+# -------------------------------------------------
+# ENGINE INTERFACE
+# -------------------------------------------------
+class ForecastEngine:
+    """
+    A forecasting engine predicts the mean modal price over the next
+    `horizon` days for a date-sorted ds/y frame.
+    """
+
+    name = None
+
+    def fit_predict(self, prophet_df, horizon, previous=None):
+        """Return (predicted_mean, fitted_model_or_None)."""
+        raise NotImplementedError
+
+    def predict_many(self, series, horizon):
+        """
+        Predicted means for a list of (dates, prices) array pairs.
+        Engines that can vectorize across series override this.
+        """
+        return np.array([
+            self.fit_predict(pd.DataFrame({"ds": d, "y": p}), horizon)[0]
+            for d, p in series
+        ])
+
+
+# -------------------------------------------------
+# PROPHET
+# -------------------------------------------------
+def _warm_start_params(model):
+    """Fitted parameters of a previous model, usable as Prophet `init`."""
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        params[name] = model.params[name][0][0]
+    for name in ("delta", "beta"):
+        params[name] = model.params[name][0]
+    return params
+
+
+def _fit_prophet(prophet_df, previous=None):
+    """
+    Fit Prophet, warm-starting from a previous fit of the same series.
+    Falls back to a cold fit when the parameter shapes no longer match.
+    """
+    from prophet import Prophet
+
+    if previous is not None:
+        try:
+            model = Prophet(daily_seasonality=True)
+            model.fit(prophet_df, init=_warm_start_params(previous))
+            return model
+        except Exception:
+            pass
+
+    model = Prophet(daily_seasonality=True)
+    model.fit(prophet_df)
+    return model
+
+
+class ProphetEngine(ForecastEngine):
+    name = "prophet"
+
+    def fit_predict(self, prophet_df, horizon, previous=None):
+        model = _fit_prophet(prophet_df, previous)
+        forecast = model.predict(model.make_future_dataframe(periods=horizon))
+        return forecast.iloc[-horizon:]["yhat"].mean(), model
+
+
+# -------------------------------------------------
+# VECTORIZED ROBUST TREND
+# -------------------------------------------------
+class TrendEngine(ForecastEngine):
+    """
+    Huber-weighted linear trend, fitted for many series at once on a
+    padded (n_series, max_len) array. No per-series Python loop.
+    """
+
+    name = "trend"
+
+    def __init__(self, iterations=2, huber_k=1.345):
+        self.iterations = iterations
+        self.huber_k = huber_k
+
+    def fit_predict(self, prophet_df, horizon, previous=None):
+        dates = prophet_df["ds"].to_numpy(dtype="datetime64[ns]")
+        prices = prophet_df["y"].to_numpy(dtype=np.float64)
+        return float(self.predict_many([(dates, prices)], horizon)[0]), None
+
+    def predict_many(self, series, horizon):
+        n = len(series)
+        if n == 0:
+            return np.empty(0)
+
+        lengths = np.fromiter((len(p) for _, p in series), dtype=np.int64, count=n)
+        width = int(lengths.max())
+
+        t = np.zeros((n, width))
+        y = np.zeros((n, width))
+        mask = np.arange(width) < lengths[:, None]
+
+        flat_dates = np.concatenate([np.asarray(d, dtype="datetime64[ns]") for d, _ in series])
+        flat_prices = np.concatenate([np.asarray(p, dtype=np.float64) for _, p in series])
+        first = np.repeat(
+            np.array([np.asarray(d, dtype="datetime64[ns]")[0] for d, _ in series]),
+            lengths,
+        )
+        t[mask] = (flat_dates - first) / np.timedelta64(1, "D")
+        y[mask] = flat_prices
+
+        w = mask.astype(np.float64)
+        for i in range(self.iterations + 1):
+            a, b = self._weighted_line(t, y, w)
+            if i == self.iterations:
+                break
+            resid = np.abs(y - (a[:, None] + b[:, None] * t))
+            resid[~mask] = np.nan
+            scale = 1.4826 * np.nanmedian(resid, axis=1)
+            cutoff = self.huber_k * np.where(scale > 0, scale, np.inf)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                w = np.where(resid > cutoff[:, None], cutoff[:, None] / resid, 1.0)
+            w[~mask] = 0.0
+
+        # Mean of the next `horizon` daily predictions after the last date
+        t_last = t[np.arange(n), lengths - 1]
+        return a + b * (t_last + (horizon + 1) / 2.0)
+
+    @staticmethod
+    def _weighted_line(t, y, w):
+        s = w.sum(axis=1)
+        st = (w * t).sum(axis=1)
+        sy = (w * y).sum(axis=1)
+        stt = (w * t * t).sum(axis=1)
+        sty = (w * t * y).sum(axis=1)
+
+        denom = s * stt - st * st
+        with np.errstate(divide="ignore", invalid="ignore"):
+            b = np.where(np.abs(denom) > 1e-12, (s * sty - st * sy) / denom, 0.0)
+            a = (sy - b * st) / s
+        return a, b
+
+
+# -------------------------------------------------
+# REGISTRY
+# -------------------------------------------------
+ENGINES = {
+    ProphetEngine.name: ProphetEngine(),
+    TrendEngine.name: TrendEngine(),
+}
+
+
+def choose_engine(n_points, engine=None):
+    """
+    Resolve an engine name. "auto" (the default) uses the trend engine
+    for short series, where Prophet's fixed overhead is not worth it.
+    """
+    engine = engine or FORECAST_ENGINE
+    if engine == "auto":
+        engine = "prophet" if n_points >= PROPHET_MIN_POINTS else "trend"
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown forecast engine: {engine}")
+    return ENGINES[engine]
@@ -0,0 +1,159 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from forecast_cache import forecast_key
+from forecast_engines import ENGINES, choose_engine
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+FORECAST_TABLE = os.environ.get("FORECAST_TABLE", "forecast_table.csv")
+TABLE_COLUMNS = [
+    "commodity", "market", "last_date", "horizon", "engine", "current", "predicted"
+]
+
+
+# -------------------------------------------------
+# REQUEST-TIME LOOKUP
+# -------------------------------------------------
+_table = None
+_table_mtime = None
+_lock = threading.Lock()
+
+
+def _load_table(path):
+    df = pd.read_csv(
+        path,
+        dtype={"commodity": str, "market": str, "last_date": str, "engine": str},
+    )
+    return {
+        (c, m, d, int(h), e): (float(cur), float(pred))
+        for c, m, d, h, e, cur, pred in df[TABLE_COLUMNS].itertuples(index=False)
+    }
+
+
+def lookup_forecast(key, path=FORECAST_TABLE):
+    """
+    (current, predicted) for a forecast_key from the precomputed table.
+    Returns None when the table is missing or the series is not in it
+    (or was precomputed against older price data).
+    """
+    global _table, _table_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    if mtime != _table_mtime:
+        with _lock:
+            if mtime != _table_mtime:
+                _table = _load_table(path)
+                _table_mtime = mtime
+    return _table.get(key)
+
+
+# -------------------------------------------------
+# BATCH PRECOMPUTE
+# -------------------------------------------------
+def _row(series, horizon, engine, predicted):
+    return forecast_key(
+        series.commodity, series.market, series.dates[-1], horizon, engine
+    ) + (float(series.prices[-1]), float(predicted))
+
+
+def _fit_one(task):
+    """Worker: fit one series with Prophet and return its predicted mean."""
+    dates, prices, horizon = task
+
+    try:
+        prophet_df = pd.DataFrame({"ds": dates, "y": prices})
+        return ENGINES["prophet"].fit_predict(prophet_df, horizon)[0]
+    except Exception:
+        return None
+
+
+def _quiet_worker():
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+
+
+def precompute_forecasts(store, out_path=FORECAST_TABLE, horizon=7,
+                         workers=None, engine=None):
+    """
+    Forecast every (commodity, market) series of a PriceStore and write the
+    table that run_agent3 reads at request time. Short series go through
+    the vectorized trend engine in one batch; Prophet fits are spread over
+    a process pool.
+    """
+    by_engine = {}
+    for s in store.all_series():
+        if len(s) >= 2:
+            name = choose_engine(len(s), engine).name
+            by_engine.setdefault(name, []).append(s)
+
+    rows = []
+    for name, series in by_engine.items():
+        if name != "prophet":
+            predicted = ENGINES[name].predict_many(
+                [(s.dates, s.prices) for s in series], horizon
+            )
+            rows.extend(_row(s, horizon, name, p) for s, p in zip(series, predicted))
+
+    prophet_series = by_engine.get("prophet", [])
+    if prophet_series:
+        tasks = [(s.dates, s.prices, horizon) for s in prophet_series]
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 4))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as pool:
+            predicted = list(pool.map(_fit_one, tasks, chunksize=chunksize))
+
+        rows.extend(
+            _row(s, horizon, "prophet", p)
+            for s, p in zip(prophet_series, predicted)
+            if p is not None
+        )
+
+    table = pd.DataFrame(rows, columns=TABLE_COLUMNS)
+    tmp = f"{out_path}.tmp"
+    table.to_csv(tmp, index=False)
+    os.replace(tmp, out_path)
+    return table
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+if __name__ == "__main__":
+    from agent3 import FORECAST_DAYS, load_and_clean_data, load_price_store
+    from price_store import get_price_store
+
+    parser = argparse.ArgumentParser(
+        description="Precompute crop × mandi price forecasts for Agent-3"
+    )
+    parser.add_argument("--csv", default=None,
+                        help="price CSV (default: warehouse, else bundled CSV)")
+    parser.add_argument("--out", default=FORECAST_TABLE)
+    parser.add_argument("--horizon", type=int, default=FORECAST_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--engine", default=None,
+                        help="prophet, trend or auto (default: FORECAST_ENGINE)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.csv:
+        store = get_price_store(args.csv, loader=load_and_clean_data)
+    else:
+        store = load_price_store()
+    table = precompute_forecasts(
+        store, args.out, args.horizon, args.workers, args.engine
+    )
+
+    print(f"✅ {len(table)} forecasts written to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
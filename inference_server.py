@@ -0,0 +1,170 @@
+import argparse
+import os
+import secrets
+import threading
+from multiprocessing.connection import Client, Listener
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# "host:port" of a running inference worker; unset → run models in-process
+INFERENCE_SERVER = os.environ.get("INFERENCE_SERVER")
+# Bind address of the worker; only a host set here is listened on publicly
+INFERENCE_LISTEN = os.environ.get("INFERENCE_LISTEN")
+# Shared secret; if unset the worker generates one into INFERENCE_AUTHKEY_FILE
+INFERENCE_AUTHKEY = os.environ.get("INFERENCE_AUTHKEY")
+INFERENCE_AUTHKEY_FILE = os.environ.get(
+    "INFERENCE_AUTHKEY_FILE", os.path.join(os.path.expanduser("~"), ".vfm_inference_key")
+)
+
+
+def _address(spec):
+    host, _, port = spec.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def _listen_address():
+    if INFERENCE_LISTEN:
+        return INFERENCE_LISTEN
+    port = INFERENCE_SERVER.rpartition(":")[2] if INFERENCE_SERVER else "8765"
+    return f"127.0.0.1:{port}"
+
+
+def load_authkey(create=False):
+    """
+    INFERENCE_AUTHKEY, else the key file. With create=True (the worker) a
+    missing key is generated with os.urandom and written 0600 for local
+    clients to read; clients never fall back to a built-in key.
+    """
+    if INFERENCE_AUTHKEY:
+        return INFERENCE_AUTHKEY.encode()
+    try:
+        with open(INFERENCE_AUTHKEY_FILE, "rb") as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    if not create:
+        raise RuntimeError(
+            "No inference auth key: set INFERENCE_AUTHKEY or start the worker "
+            f"to create {INFERENCE_AUTHKEY_FILE}"
+        )
+
+    key = secrets.token_hex(32).encode()  # os.urandom, hex so it survives env vars
+    fd = os.open(INFERENCE_AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    print(f"🔑 Generated inference auth key in {INFERENCE_AUTHKEY_FILE}")
+    return key
+
+
+# -------------------------------------------------
+# SERVER (one process owns the models)
+# -------------------------------------------------
+def _methods():
+    from agent1 import run_agent1, run_agent1_batch
+    from agent2 import run_agent2, run_agent2_batch
+    return {
+        "run_agent1": run_agent1,
+        "run_agent1_batch": run_agent1_batch,
+        "run_agent2": run_agent2,
+        "run_agent2_batch": run_agent2_batch,
+    }
+
+
+def _serve_connection(conn, methods, model_lock):
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                with model_lock:
+                    result = methods[method](*args, **kwargs)
+                conn.send((True, result))
+            except Exception as e:
+                conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+def serve(address, authkey=None, preload=True):
+    """
+    Serve agent1/agent2 inference to app workers over a local socket.
+    Every connection gets a thread; model calls are serialized.
+    """
+    if authkey is None:
+        authkey = load_authkey(create=True)
+    methods = _methods()
+    if preload:
+        from model_registry import get_registry
+        get_registry().preload()
+
+    model_lock = threading.Lock()
+    with Listener(address, authkey=authkey) as listener:
+        print(f"🧠 Inference worker listening on {address}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(
+                target=_serve_connection,
+                args=(conn, methods, model_lock),
+                daemon=True,
+            ).start()
+
+
+# -------------------------------------------------
+# CLIENT (used by app workers)
+# -------------------------------------------------
+class InferenceClient:
+    """Calls a remote inference worker; one connection per thread."""
+
+    def __init__(self, address, authkey=None):
+        self.address = address
+        self.authkey = authkey if authkey is not None else load_authkey()
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def call(self, method, *args, **kwargs):
+        conn = self._conn()
+        try:
+            conn.send((method, args, kwargs))
+            ok, result = conn.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def run_agent1(self, image, **kwargs):
+        return self.call("run_agent1", image, **kwargs)
+
+    def run_agent2(self, image):
+        return self.call("run_agent2", image)
+
+
+_client = None
+
+
+def get_client():
+    """InferenceClient for INFERENCE_SERVER, or None to run in-process."""
+    global _client
+    if INFERENCE_SERVER and _client is None:
+        _client = InferenceClient(_address(INFERENCE_SERVER))
+    return _client
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared agent inference worker")
+    parser.add_argument("--listen", default=_listen_address(),
+                        help="host:port to bind (default: localhost only)")
+    parser.add_argument("--no-preload", action="store_true")
+    args = parser.parse_args()
+
+    serve(_address(args.listen), preload=not args.no_preload)
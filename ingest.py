@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from market_client import AGMARKNET_URL, MarketDataClient
+from price_warehouse import COLUMNS, PRICE_DB, append_rows, import_csv
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+def _env_list(name, default):
+    value = os.environ.get(name)
+    return [v.strip() for v in value.split(",") if v.strip()] if value else default
+
+
+COMMODITIES = _env_list("INGEST_COMMODITIES", [])  # empty = every Agmarknet commodity
+STATES = _env_list("INGEST_STATES", ["0"])   # "0" = all states on Agmarknet
+INGEST_CONCURRENCY = int(os.environ.get("INGEST_CONCURRENCY", "8"))
+
+# Agmarknet grid header → warehouse column (matched case-insensitively)
+_HEADER_MAP = [
+    ("district", "District"),
+    ("market", "Market"),
+    ("commodity", "Commodity"),
+    ("variety", "Variety"),
+    ("grade", "Grade"),
+    ("min", "Min Price"),
+    ("max", "Max Price"),
+    ("modal", "Modal Price"),
+    ("date", "Price Date"),
+]
+
+
+# -------------------------------------------------
+# PARSING (lxml, no BeautifulSoup tree walk)
+# -------------------------------------------------
+def parse_price_table(html, commodity=None):
+    """Rows of the cphBody_GridView1 table as a warehouse-shaped frame."""
+    import lxml.html
+
+    tree = lxml.html.fromstring(html)
+    table = tree.xpath('//table[@id="cphBody_GridView1"]')
+    if not table:
+        return pd.DataFrame(columns=COLUMNS)
+
+    rows = table[0].xpath(".//tr")
+    if not rows:
+        return pd.DataFrame(columns=COLUMNS)
+    headers = [h.text_content().strip().lower() for h in rows[0].xpath("./th|./td")]
+
+    positions = {}
+    for i, header in enumerate(headers):
+        for needle, column in _HEADER_MAP:
+            if needle in header and column not in positions:
+                positions[column] = i
+                break
+
+    records = []
+    for row in rows[1:]:
+        cells = [c.text_content().strip() for c in row.xpath("./td")]
+        if len(cells) < len(headers):
+            continue
+        records.append({col: cells[i] for col, i in positions.items()})
+
+    df = pd.DataFrame(records).reindex(columns=COLUMNS)
+    if commodity and df["Commodity"].isna().all():
+        df["Commodity"] = commodity
+    df["Price Unit"] = df["Price Unit"].fillna("Rs./Quintal")
+    df["Price Date"] = pd.to_datetime(df["Price Date"], dayfirst=True, errors="coerce")
+    return df
+
+
+# -------------------------------------------------
+# CONCURRENT FETCH
+# -------------------------------------------------
+def _payload(commodity, state, date):
+    return {
+        "ctl00$ddlCommodity": commodity,
+        "ctl00$ddlState": state,
+        "ctl00$ddlMarket": "0",
+        "ctl00$txtDate": date.strftime("%d-%b-%Y"),
+        "ctl00$btnSubmit": "Search"
+    }
+
+
+def parse_commodity_list(html):
+    """Commodity names offered by the Agmarknet search form."""
+    import lxml.html
+
+    tree = lxml.html.fromstring(html)
+    options = tree.xpath('//select[contains(@id, "ddlCommodity")]/option')
+    return [
+        o.text_content().strip() for o in options
+        if o.get("value") not in (None, "", "0") and o.text_content().strip()
+    ]
+
+
+async def fetch_all(commodities=COMMODITIES, states=STATES, date=None,
+                    concurrency=INGEST_CONCURRENCY):
+    """
+    Fetch every commodity × state page concurrently; returns one frame.
+    No commodities → all of those listed on the Agmarknet search form.
+    """
+    date = date or datetime.now()
+    client = MarketDataClient(timeout=30, concurrency=concurrency)
+    if not commodities:
+        try:
+            commodities = parse_commodity_list(await client.request("GET", AGMARKNET_URL))
+        except Exception:
+            await client.close()
+            raise
+        print(f"📋 {len(commodities)} commodities listed on Agmarknet")
+
+    async def one(commodity, state):
+        try:
+            html = await client.post_text(
+                AGMARKNET_URL, data=_payload(commodity, state, date)
+            )
+        except Exception as e:
+            print(f"⚠️ {commodity}/{state}: {e}")
+            return None
+        return parse_price_table(html, commodity)
+
+    try:
+        frames = await asyncio.gather(
+            *(one(c, s) for c in commodities for s in states)
+        )
+    finally:
+        await client.close()
+
+    frames = [f for f in frames if f is not None and not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+
+def run_ingest(commodities=COMMODITIES, states=STATES, db_path=PRICE_DB, date=None):
+    """Fetch today's prices and append the new rows to the warehouse."""
+    df = asyncio.run(fetch_all(commodities, states, date))
+    return len(df), append_rows(df, db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest Agmarknet prices into the local price warehouse"
+    )
+    parser.add_argument("--db", default=PRICE_DB)
+    parser.add_argument("--commodities", nargs="*", default=COMMODITIES,
+                        help="default: all commodities on Agmarknet")
+    parser.add_argument("--states", nargs="*", default=STATES)
+    parser.add_argument("--seed-csv", default=None,
+                        help="import a price CSV into the warehouse first")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.seed_csv:
+        print(f"🌱 Seeded {import_csv(args.seed_csv, args.db)} rows from {args.seed_csv}")
+
+    fetched, inserted = run_ingest(args.commodities, args.states, args.db)
+    print(f"✅ Fetched {fetched} rows, {inserted} new "
+          f"in {time.perf_counter() - start:.1f}s")
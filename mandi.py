@@ -1,8 +1,12 @@
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from agent3 import load_price_store
+from market_client import AGMARKNET_URL, CircuitOpenError, get_client, run_sync
+
+AGMARKNET_DEADLINE = 20.0  # seconds for the whole scrape, retries included
+
 
 # -----------------------------
 # SCRAPE LIVE MANDI PRICES
@@ -10,9 +14,9 @@ from datetime import datetime
 def fetch_live_mandi_prices(crop):
     """
     Scrapes Agmarknet for latest mandi prices of a crop
+    (skipped immediately while the Agmarknet circuit breaker is open;
+    None if the site doesn't answer within AGMARKNET_DEADLINE)
     """
-    url = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
-
     payload = {
         "ctl00$ddlCommodity": crop,
         "ctl00$ddlState": "0",
@@ -21,12 +25,16 @@ def fetch_live_mandi_prices(crop):
         "ctl00$btnSubmit": "Search"
     }
 
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    client = get_client("agmarknet", timeout=15, deadline=AGMARKNET_DEADLINE)
+    try:
+        html = run_sync(
+            client.post_text(AGMARKNET_URL, data=payload),
+            timeout=AGMARKNET_DEADLINE + 1,
+        )
+    except (CircuitOpenError, TimeoutError):
+        return None
 
-    response = requests.post(url, data=payload, headers=headers, timeout=15)
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     table = soup.find("table", {"id": "cphBody_GridView1"})
     if table is None:
@@ -51,17 +59,23 @@ def fetch_live_mandi_prices(crop):
 # AGENT-3 LOGIC
 # -----------------------------
 def run_agent3(crop):
+    """
+    Best mandi from the latest warehoused prices.
+    Live scraping now happens only in the scheduled ingest.py job.
+    """
     crop = crop.strip().title()
 
-    df = fetch_live_mandi_prices(crop)
+    latest = load_price_store().latest_prices(crop)
 
-    if df is None or df.empty:
+    if not latest:
         return {
             "crop": crop,
-            "error": "Live mandi data unavailable",
+            "error": "Mandi data unavailable",
             "recommendation": "Market data could not be fetched"
         }
 
+    df = pd.DataFrame(latest, columns=["mandi", "date", "price"])
+
     # Select best mandi
     best_row = df.loc[df["price"].idxmax()]
 
@@ -79,7 +93,7 @@ def run_agent3(crop):
         "current_price": round(best_row["price"], 2),
         "average_price": round(avg_price, 2),
         "recommendation": decision,
-        "data_source": "Agmarknet (Live)"
+        "data_source": "Agmarknet (warehouse)"
     }
 
 if __name__ == "__main__":
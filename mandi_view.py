@@ -0,0 +1,161 @@
+import math
+import os
+import threading
+import weakref
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+import pandas as pd
+
+from price_store import subscribe
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# Optional CSV with Market, Latitude, Longitude (District rows also work)
+MARKET_COORDS_CSV = os.environ.get("MARKET_COORDS_CSV", "market_coords.csv")
+
+MandiPrice = namedtuple(
+    "MandiPrice",
+    "commodity market district date modal_price min_price max_price",
+)
+
+
+def _haversine_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 12742.0 * math.asin(math.sqrt(h))
+
+
+def load_coordinates(path=MARKET_COORDS_CSV):
+    """{market or district name (lower): (lat, lon)}; empty if no file."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path)
+    name_col = "Market" if "Market" in df else "District"
+    return {
+        str(name).lower(): (float(lat), float(lon))
+        for name, lat, lon in df[[name_col, "Latitude", "Longitude"]].itertuples(index=False)
+    }
+
+
+# -------------------------------------------------
+# MATERIALIZED VIEW
+# -------------------------------------------------
+class BestMandiView:
+    """
+    Latest modal/min/max price per (commodity, market, district), kept
+    ranked by modal price per commodity and per (commodity, district).
+
+    Rankings are sorted lists maintained with bisect, so an update
+    touches only the changed markets and top-k is a slice.
+    """
+
+    def __init__(self, store, coordinates=None):
+        self.coordinates = load_coordinates() if coordinates is None else coordinates
+        self._rows = {}       # (commodity_key, market) → MandiPrice
+        self._ranked = {}     # commodity_key → [(rank_key, market)]
+        self._by_district = {}  # (commodity_key, district_lower) → [(rank_key, market)]
+        self._lock = threading.Lock()
+        self.update(store, {(s.commodity.lower(), s.market) for s in store.all_series()})
+
+    @staticmethod
+    def _rank_key(row):
+        # Highest price first; ties → market with the oldest latest row
+        return (-row.modal_price, row.date, row.market)
+
+    def _index_lists(self, key, row):
+        lists = [self._ranked.setdefault(key, [])]
+        if pd.notna(row.district) and row.district:
+            lists.append(
+                self._by_district.setdefault((key, str(row.district).lower()), [])
+            )
+        return lists
+
+    def update(self, store, changed):
+        """Re-materialize the given (commodity_key, market) rows."""
+        with self._lock:
+            for key, market in changed:
+                old = self._rows.pop((key, market), None)
+                if old is not None:
+                    entry = (self._rank_key(old), market)
+                    for ranked in self._index_lists(key, old):
+                        i = bisect_left(ranked, entry)
+                        if i < len(ranked) and ranked[i] == entry:
+                            del ranked[i]
+
+                series = store.series(key, market)
+                if series is None:
+                    continue
+                row = MandiPrice(
+                    series.commodity, market, series.district, series.last_date,
+                    series.last_price, float(series.last_min), float(series.last_max),
+                )
+                self._rows[(key, market)] = row
+                for ranked in self._index_lists(key, row):
+                    insort(ranked, (self._rank_key(row), market))
+
+    def _location(self, row):
+        return (self.coordinates.get(row.market.lower())
+                or self.coordinates.get(str(row.district).lower()))
+
+    def top_k(self, crop, k=5, district=None, near=None, radius_km=None):
+        """
+        Best k mandis for a crop by latest modal price.
+        district  : only mandis in this district (pre-ranked, O(k))
+        near      : (lat, lon) of the farmer; with radius_km, only mandis
+                    with known coordinates within that distance
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        key = crop.lower()
+        with self._lock:
+            if district is not None:
+                ranked = self._by_district.get((key, district.lower()), [])
+            else:
+                ranked = self._ranked.get(key, [])
+
+            if near is None or radius_km is None:
+                return [self._rows[(key, m)] for _, m in ranked[:k]]
+
+            # Walk in price order and stop at k hits
+            out = []
+            for _, market in ranked:
+                row = self._rows[(key, market)]
+                loc = self._location(row)
+                if loc is not None and _haversine_km(near, loc) <= radius_km:
+                    out.append(row)
+                    if len(out) == k:
+                        break
+            return out
+
+    def best(self, crop):
+        top = self.top_k(crop, 1)
+        if not top:
+            raise ValueError("No data found for crop")
+        return top[0].market, top[0].modal_price
+
+
+# One view per PriceStore object (not per source path: a rebuilt store or
+# an ad-hoc PriceStore(df) must never see another dataset's rankings)
+_views = weakref.WeakKeyDictionary()
+_view_lock = threading.Lock()
+
+
+def get_best_mandi_view(store):
+    """Shared view for `store`, built on first use."""
+    view = _views.get(store)
+    if view is None:
+        with _view_lock:
+            view = _views.get(store)
+            if view is None:
+                view = _views[store] = BestMandiView(store)
+    return view
+
+
+@subscribe
+def _on_prices_changed(store, changed):
+    view = _views.get(store)
+    if view is not None:
+        view.update(store, changed)
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+AGMARKNET_URL = os.environ.get("AGMARKNET_URL", "https://agmarknet.gov.in/SearchCmmMkt.aspx")
+LIVE_MANDI_URL = os.environ.get("LIVE_MANDI_URL", "https://example-mandi-api.com/prices")
+
+MAX_CONCURRENCY = 8
+RETRIES = 1
+BACKOFF = 0.5              # seconds, doubled per retry (+ jitter)
+BREAKER_FAILURES = 3       # consecutive failures before the breaker opens
+BREAKER_RESET = 60.0       # seconds before a half-open probe is allowed
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+# -------------------------------------------------
+# CIRCUIT BREAKER
+# -------------------------------------------------
+class CircuitBreaker:
+    """
+    closed → (N consecutive failures) → open → (reset timeout) →
+    half-open: one probe request; success closes, failure re-opens.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._count = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        return self.acquire()[0]
+
+    def acquire(self):
+        """(allowed, is_probe) for one request; the probe holder must release()."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True, False
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True, True
+            return False, False
+
+    def record_success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._count += 1
+            if self._probing or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """End this request's probe if it finished without a verdict (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+
+_breakers = {}
+
+
+def breaker_for(url):
+    """Shared breaker per host, so every client sees the same outage."""
+    host = urlsplit(url).netloc
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker()
+    return _breakers[host]
+
+
+# -------------------------------------------------
+# ASYNC CLIENT
+# -------------------------------------------------
+class MarketDataClient:
+    """
+    asyncio HTTP client for market data: one pooled aiohttp session,
+    bounded concurrency, retries with exponential backoff and a
+    per-host circuit breaker. `timeout` bounds each attempt, `deadline`
+    (if set) the whole request including retries and backoff. Every
+    failed attempt counts towards opening the breaker.
+    """
+
+    def __init__(self, timeout=10.0, concurrency=MAX_CONCURRENCY,
+                 retries=RETRIES, backoff=BACKOFF, headers=None, deadline=None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or {"User-Agent": "Mozilla/5.0"}
+        self._session = None
+        self._semaphore = None
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers,
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def request(self, method, url, *, parse="text", **kwargs):
+        breaker = breaker_for(url)
+        allowed, probe = breaker.acquire()
+        if not allowed:
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        attempts = asyncio.ensure_future(self._attempts(breaker, method, url, parse, kwargs))
+        try:
+            done, _ = await asyncio.wait({attempts}, timeout=self.deadline)
+            if not done:
+                breaker.record_failure()
+                raise asyncio.TimeoutError(
+                    f"{urlsplit(url).netloc}: no response within {self.deadline}s"
+                )
+            return attempts.result()
+        finally:
+            attempts.cancel()  # no-op once finished
+            if probe:
+                # A cancelled probe must not leave the breaker half-open forever
+                breaker.release()
+
+    async def _attempts(self, breaker, method, url, parse, kwargs):
+        session = await self._get_session()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = self.backoff * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+            try:
+                async with self._semaphore:
+                    async with session.request(method, url, **kwargs) as response:
+                        response.raise_for_status()
+                        if parse == "json":
+                            body = await response.json(content_type=None)
+                        else:
+                            body = await response.text()
+                breaker.record_success()
+                return body
+            except Exception as e:
+                last_error = e
+                breaker.record_failure()
+                status = getattr(e, "status", None)
+                if status is not None and 400 <= status < 500 and status != 429:
+                    break  # client errors won't improve with retries
+                if breaker.state != "closed":
+                    break  # this failure opened the breaker
+        raise last_error
+
+    async def get_json(self, url, params=None):
+        return await self.request("GET", url, params=params, parse="json")
+
+    async def post_text(self, url, data=None):
+        return await self.request("POST", url, data=data, parse="text")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# -------------------------------------------------
+# SYNC BRIDGE (one background event loop per process)
+# -------------------------------------------------
+_loop = None
+_loop_lock = threading.Lock()
+_clients = {}
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="market-client", daemon=True
+            ).start()
+    return _loop
+
+
+def run_sync(coro, timeout=None):
+    """
+    Run a coroutine on the shared loop from synchronous code. On timeout
+    the coroutine is cancelled, not left running in the background.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def get_client(name, timeout, deadline=None):
+    """Named shared client (its session lives on the background loop)."""
+    if name not in _clients:
+        _clients[name] = MarketDataClient(timeout=timeout, deadline=deadline)
+    return _clients[name]
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", "10"))
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "16"))
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", "256"))
+
+
+class QueueFullError(RuntimeError):
+    """Raised instead of queueing when a batcher is at capacity."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """The request's deadline passed before its result was ready."""
+
+
+# -------------------------------------------------
+# MICRO-BATCHER
+# -------------------------------------------------
+class MicroBatcher:
+    """
+    Groups concurrent async requests into one call of a blocking batch
+    function (list of inputs → list of outputs, same order).
+
+    A batch closes after `max_batch_size` items or `window_ms` after its
+    first item. Batches run one at a time in `executor` (the default
+    thread pool if None); requests arriving meanwhile queue up and form
+    the next, larger batch. The queue is bounded: submit() fails fast
+    with QueueFullError instead of letting latency grow without limit.
+    Requests whose deadline passes while queued are dropped before the
+    model call.
+    """
+
+    def __init__(self, batch_fn, name="batch", max_batch_size=MAX_BATCH_SIZE,
+                 window_ms=BATCH_WINDOW_MS, max_queue=MAX_QUEUE, executor=None):
+        self.batch_fn = batch_fn
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self.max_queue = max_queue
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def start(self):
+        """Start the worker on the running event loop (idempotent)."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(
+                self._run(), name=f"microbatch-{self.name}"
+            )
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item, timeout=None):
+        """Result of batch_fn for `item`; `timeout` seconds is its deadline."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put_nowait((item, future, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} queue is full ({self.max_queue})") from None
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(f"{self.name} deadline exceeded") from None
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = closes_at - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            now = time.monotonic()
+            live = []
+            for item, future, deadline in batch:
+                if future.done():          # caller gave up (deadline / disconnect)
+                    self.expired += 1
+                elif deadline is not None and deadline <= now:
+                    self.expired += 1
+                    future.set_exception(DeadlineExceededError(f"{self.name} deadline exceeded"))
+                else:
+                    live.append((item, future))
+            if not live:
+                continue
+
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.batch_fn, [item for item, _ in live]
+                )
+            except Exception as e:
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(live)
+            for (_, future), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "queued": self.depth,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import OrderedDict
+
+from result_cache import file_hash
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+# 0 → unbounded. Sizes are estimated from the model file size times
+# MODEL_MEMORY_FACTOR (weights + framework buffers).
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("MODEL_MEMORY_BUDGET_MB", "0"))
+MODEL_MEMORY_FACTOR = float(os.environ.get("MODEL_MEMORY_FACTOR", "3"))
+
+
+class ModelRegistry:
+    """
+    Process-wide model cache shared by every agent and session.
+
+    Models are loaded once per key, concurrent callers wait on the same
+    load, and when a memory budget is set the least recently used models
+    are dropped to make room. The sha256 of the model file is recorded at
+    load time; when the file on disk changes the model is reloaded.
+    """
+
+    def __init__(self, budget_mb=MODEL_MEMORY_BUDGET_MB):
+        self.budget = budget_mb * 1024 * 1024
+        self._models = OrderedDict()   # key → (model, estimated bytes, file sha256)
+        self._loaders = {}             # key → (loader, path)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def register(self, key, loader, path=None):
+        """Declare how to load `key` so it can be preloaded by name."""
+        self._loaders[key] = (loader, path)
+
+    def get(self, key, loader=None, path=None):
+        """Cached model for `key`, loading it on first use."""
+        return self.get_with_hash(key, loader, path)[0]
+
+    def get_with_hash(self, key, loader=None, path=None):
+        """
+        (model, sha256 of the file it was loaded from) for `key`. The hash
+        identifies the model actually in memory, for result cache keys.
+        """
+        if loader is None:
+            loader, path = self._loaders[key]
+        digest = self._hash(path)
+
+        with self._lock:
+            hit = self._models.get(key)
+            if hit is not None and hit[2] == digest:
+                self._models.move_to_end(key)
+                return hit[0], digest
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                hit = self._models.get(key)
+                if hit is not None and hit[2] != digest:
+                    del self._models[key]  # file replaced on disk: reload
+                    hit = None
+            if hit is not None:
+                return hit[0], digest
+
+            size = self._estimate(path)
+            self._make_room(size)
+            model = loader()
+
+            with self._lock:
+                self._models[key] = (model, size, digest)
+        return model, digest
+
+    def preload(self, keys=None):
+        for key in keys or list(self._loaders):
+            self.get(key)
+
+    def evict(self, key):
+        with self._lock:
+            self._models.pop(key, None)
+
+    def loaded(self):
+        """{key: estimated MB} of the models currently in memory."""
+        with self._lock:
+            return {k: round(v[1] / 1e6, 1) for k, v in self._models.items()}
+
+    @staticmethod
+    def _hash(path):
+        try:
+            return file_hash(path)
+        except (OSError, TypeError):
+            return "missing"
+
+    @staticmethod
+    def _estimate(path):
+        try:
+            return os.path.getsize(path) * MODEL_MEMORY_FACTOR
+        except (OSError, TypeError):
+            return 0
+
+    def _make_room(self, size):
+        if not self.budget:
+            return
+        with self._lock:
+            used = sum(v[1] for v in self._models.values())
+            while self._models and used + size > self.budget:
+                _, (_, freed, _) = self._models.popitem(last=False)
+                used -= freed
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """The shared ModelRegistry of this process."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
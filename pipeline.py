@@ -0,0 +1,168 @@
+import atexit
+import contextvars
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from agent1 import run_agent1
+from agent2 import run_agent2
+from agent3 import run_agent3
+from inference_server import get_client
+from reco import get_weather, recommendation_agent
+from telemetry import profile_request
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+AGENT_TIMEOUTS = {
+    "agent1": 30.0,
+    "agent2": 30.0,
+    "agent3": 60.0,
+    "weather": 12.0,
+}
+
+
+# -------------------------------------------------
+# PARTIAL-RESULT FALLBACKS
+# -------------------------------------------------
+def fallback_output(name, crop):
+    if name == "agent1":
+        return {
+            "field_label": "Unavailable",
+            "confidence": 0.0,
+            "weed_percentage": 0,
+            "crop_stage": "Unknown",
+        }
+    if name == "agent2":
+        return {
+            "health_status": "Unavailable",
+            "confidence": 0.0,
+            "probabilities": {},
+        }
+    if name == "agent3":
+        return {
+            "crop": crop,
+            "best_mandi": "Not available",
+            "current_price": "N/A",
+            "predicted_price": "N/A",
+            "recommendation": "Market data unavailable",
+            "data_source": "unavailable",
+        }
+    return {"source": "unavailable", "rain": False}
+
+
+# -------------------------------------------------
+# EXECUTORS (shared, so timed-out work never blocks a request)
+# -------------------------------------------------
+_threads = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent")
+_processes = None
+
+
+def _process_pool():
+    global _processes
+    if _processes is None:
+        _processes = ProcessPoolExecutor(max_workers=1)
+    return _processes
+
+
+def _kill_process_pool():
+    """
+    Drop the agent3 worker after a timeout: its single process is still
+    busy with the abandoned call, so every later submit would queue
+    behind it. The next request starts a fresh pool.
+    """
+    global _processes
+    pool, _processes = _processes, None
+    if pool is None:
+        return
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown():
+    _threads.shutdown(wait=False, cancel_futures=True)
+    if _processes is not None:
+        _processes.shutdown(wait=False, cancel_futures=True)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _submit(fn, *args, **kwargs):
+    """Run on the agent threads inside a copy of this context (keeps spans nested)."""
+    return _threads.submit(contextvars.copy_context().run, _timed, fn, *args, **kwargs)
+
+
+# -------------------------------------------------
+# ORCHESTRATOR
+# -------------------------------------------------
+@profile_request("pipeline")
+def run_pipeline(field_image, leaf_image, crop, city, api_key=None,
+                 timeouts=None, isolate_agent3=False, language="English"):
+    """
+    Run Agent-1, Agent-2, Agent-3 and the weather fetch concurrently,
+    then Agent-4 on whatever came back.
+
+    Each agent has its own timeout; an agent that fails or times out is
+    replaced by a neutral fallback so the advisory is still produced.
+    With isolate_agent3=True the Prophet path runs in a worker process.
+    `language` selects the advisory text (English, Hindi or Telugu).
+
+    Returns {"agent1", "agent2", "agent3", "weather", "final",
+             "annotated_image", "timings": {agent: seconds},
+             "errors": {agent: message}}.
+    """
+    timeouts = {**AGENT_TIMEOUTS, **(timeouts or {})}
+    start = time.perf_counter()
+
+    # Models live in a shared inference worker when INFERENCE_SERVER is set
+    client = get_client()
+    agent1 = client.run_agent1 if client else run_agent1
+    agent2 = client.run_agent2 if client else run_agent2
+
+    futures = {
+        "agent1": _submit(agent1, field_image, return_annotated=True),
+        "agent2": _submit(agent2, leaf_image),
+    }
+    if isolate_agent3:
+        futures["agent3"] = _process_pool().submit(_timed, run_agent3, crop)
+    else:
+        futures["agent3"] = _submit(run_agent3, crop)
+    if api_key:
+        futures["weather"] = _submit(get_weather, city, api_key)
+
+    # Deadlines are measured from submission, so waits overlap
+    outputs, timings, errors = {}, {}, {}
+    for name, future in futures.items():
+        remaining = timeouts[name] - (time.perf_counter() - start)
+        try:
+            outputs[name], timings[name] = future.result(timeout=max(remaining, 0))
+        except Exception as e:  # includes TimeoutError
+            future.cancel()
+            if name == "agent3" and isolate_agent3 and not future.done():
+                _kill_process_pool()
+            outputs[name] = fallback_output(name, crop)
+            timings[name] = round(time.perf_counter() - start, 3)
+            errors[name] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+    if "weather" not in outputs:
+        outputs["weather"] = fallback_output("weather", crop)
+
+    annotated = outputs["agent1"].pop("annotated_image", None)
+
+    reco_start = time.perf_counter()
+    outputs["final"] = recommendation_agent(
+        outputs["agent1"], outputs["agent2"], outputs["agent3"], outputs["weather"],
+        language=language,
+    )
+    timings["recommendation"] = time.perf_counter() - reco_start
+    timings["total"] = time.perf_counter() - start
+
+    outputs["annotated_image"] = annotated
+    outputs["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    outputs["errors"] = errors
+    return outputs
@@ -0,0 +1,283 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# -------------------------------------------------
+# PRICE SERIES
+# -------------------------------------------------
+class PriceSeries:
+    """
+    Date-sorted modal prices for one (commodity, market) pair, plus the
+    district and min/max price of its latest row.
+    """
+
+    __slots__ = ("commodity", "market", "dates", "prices",
+                 "district", "last_min", "last_max")
+
+    def __init__(self, commodity, market, dates, prices,
+                 district=None, last_min=np.nan, last_max=np.nan):
+        self.commodity = commodity
+        self.market = market
+        self.dates = dates
+        self.prices = prices
+        self.district = district
+        self.last_min = last_min
+        self.last_max = last_max
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1])
+
+    @property
+    def last_price(self):
+        return float(self.prices[-1])
+
+    def since(self, start):
+        """Slice of the series from `start` onwards (binary search)."""
+        i = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)))
+        return PriceSeries(
+            self.commodity, self.market, self.dates[i:], self.prices[i:],
+            self.district, self.last_min, self.last_max,
+        )
+
+    def to_frame(self):
+        return pd.DataFrame({"Price Date": self.dates, "Modal Price": self.prices})
+
+
+# -------------------------------------------------
+# PRICE STORE
+# -------------------------------------------------
+class PriceStore:
+    """
+    In-memory price index built once from a cleaned price frame.
+
+    Series are keyed by (commodity.lower(), market) and hold numpy arrays
+    sorted by date, so the latest price of a market is the last element
+    and a market's history is a single dict lookup.
+    """
+
+    def __init__(self, df, source=None, mtime=None, cursor=None):
+        self.source = source
+        self.mtime = mtime
+        self.cursor = cursor
+        self._series = {}
+        self._markets = {}
+        for key, series in self._group(df):
+            self._series[key] = series
+            self._markets.setdefault(key[0], []).append(key[1])
+
+    @staticmethod
+    def _group(df):
+        """
+        Yield ((key, market), PriceSeries) for a cleaned frame.
+        Rows repeating a (commodity, market, date) keep the last one.
+        """
+        if df.empty:
+            return
+
+        df = df.assign(_key=df["Commodity"].str.lower())
+        df = df.sort_values(["_key", "Market", "Price Date"], kind="mergesort")
+        df = df.drop_duplicates(["_key", "Market", "Price Date"], keep="last")
+
+        dates = df["Price Date"].to_numpy(dtype="datetime64[ns]")
+        prices = df["Modal Price"].to_numpy(dtype=np.float64)
+        keys = df["_key"].to_numpy()
+        markets = df["Market"].to_numpy()
+        commodities = df["Commodity"].to_numpy()
+        districts = (
+            df["District"].to_numpy() if "District" in df
+            else np.full(len(df), None, dtype=object)
+        )
+        mins, maxs = (
+            pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+            if col in df else np.full(len(df), np.nan)
+            for col in ("Min Price", "Max Price")
+        )
+
+        # Run boundaries of (key, market) in the sorted frame
+        change = np.ones(len(df), dtype=bool)
+        change[1:] = (keys[1:] != keys[:-1]) | (markets[1:] != markets[:-1])
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:], len(df))
+
+        for s, e in zip(starts, ends):
+            key, market = keys[s], markets[s]
+            yield (key, market), PriceSeries(
+                commodities[s], market, dates[s:e], prices[s:e],
+                districts[e - 1], mins[e - 1], maxs[e - 1],
+            )
+
+    # ---------- incremental updates ----------
+    def high_water_marks(self):
+        """{(commodity_key, market): last price date} for every series."""
+        return {k: s.last_date for k, s in self._series.items()}
+
+    def apply_delta(self, df):
+        """
+        Merge new rows into the index. Per series, only rows newer than its
+        high-water mark are taken, so re-delivered rows are ignored.
+        Returns the set of (commodity_key, market) keys that changed.
+        """
+        changed = set()
+        for key, new in self._group(df):
+            old = self._series.get(key)
+            if old is None:
+                self._series[key] = new
+                self._markets.setdefault(key[0], []).append(key[1])
+                changed.add(key)
+                continue
+
+            fresh = new.dates > old.dates[-1]
+            if not fresh.any():
+                continue
+            self._series[key] = PriceSeries(
+                old.commodity, old.market,
+                np.concatenate([old.dates, new.dates[fresh]]),
+                np.concatenate([old.prices, new.prices[fresh]]),
+                new.district, new.last_min, new.last_max,
+            )
+            changed.add(key)
+        return changed
+
+    def diff(self, other):
+        """Keys whose series differ (added, removed or new last row)."""
+        changed = set(self._series) ^ set(other._series)
+        for key in set(self._series) & set(other._series):
+            a, b = self._series[key], other._series[key]
+            if len(a) != len(b) or a.last_date != b.last_date \
+                    or a.last_price != b.last_price:
+                changed.add(key)
+        return changed
+
+    # ---------- lookups ----------
+    def commodities(self):
+        return list(self._markets)
+
+    def markets(self, crop):
+        return list(self._markets.get(crop.lower(), ()))
+
+    def series(self, crop, mandi):
+        """History for one mandi, or None if the pair is unknown."""
+        return self._series.get((crop.lower(), mandi))
+
+    def all_series(self):
+        return self._series.values()
+
+    def latest_prices(self, crop):
+        """[(market, last_date, last_price)] for every market of a crop."""
+        key = crop.lower()
+        out = []
+        for market in self._markets.get(key, ()):
+            s = self._series[(key, market)]
+            out.append((market, s.last_date, s.last_price))
+        return out
+
+    def best_mandi(self, crop):
+        """Market with the highest latest modal price."""
+        latest = self.latest_prices(crop)
+        if not latest:
+            raise ValueError("No data found for crop")
+
+        # Ties go to the market whose latest row is oldest, matching the
+        # date-sorted groupby/idxmax order of select_best_mandi.
+        latest.sort(key=lambda x: x[1])
+        market, _, price = max(latest, key=lambda x: x[2])
+        return market, price
+
+    def price_on(self, crop, mandi, date):
+        """Last known modal price on or before `date`."""
+        s = self.series(crop, mandi)
+        if s is None:
+            return None
+        i = np.searchsorted(
+            s.dates, np.datetime64(pd.Timestamp(date)), side="right"
+        )
+        return float(s.prices[i - 1]) if i else None
+
+
+# -------------------------------------------------
+# CHANGE NOTIFICATION
+# -------------------------------------------------
+_subscribers = []
+
+
+def subscribe(callback):
+    """
+    Register callback(store, changed_keys), called after a store picks up
+    new rows. changed_keys is a set of (commodity_key, market).
+    """
+    _subscribers.append(callback)
+    return callback
+
+
+def _notify(store, changed):
+    if not changed:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(store, changed)
+        except Exception:
+            pass  # a broken cache must not break price loading
+
+
+# -------------------------------------------------
+# PROCESS-WIDE CACHE (reloads on mtime change)
+# -------------------------------------------------
+_stores = {}
+_lock = threading.Lock()
+
+
+def get_price_store(csv_path, loader=None, delta_loader=None, cursor=None):
+    """
+    Return the shared PriceStore for `csv_path`.
+
+    The file is parsed once. When its mtime changes and a
+    `delta_loader(path, cursor) -> (frame, new_cursor) | None` is given,
+    only the rows past the stored cursor are read and merged; otherwise
+    (or when the delta loader returns None) the file is fully re-parsed.
+    `cursor(path)` gives the starting cursor for a full load.
+    Subscribers are told which series changed either way.
+    """
+    if loader is None:
+        from agent3 import load_and_clean_data as loader
+
+    path = os.path.abspath(csv_path)
+    mtime = os.stat(path).st_mtime_ns
+
+    store = _stores.get(path)
+    if store is not None and store.mtime == mtime:
+        return store
+
+    with _lock:
+        store = _stores.get(path)
+        if store is not None and store.mtime == mtime:
+            return store
+
+        if store is not None and delta_loader is not None:
+            delta = delta_loader(path, store.cursor)
+            if delta is not None:
+                df, new_cursor = delta
+                changed = store.apply_delta(df)
+                # Only now: if the merge raised, the next call retries it
+                # (rows already merged are skipped by the high-water marks)
+                store.cursor, store.mtime = new_cursor, mtime
+                _notify(store, changed)
+                return store
+
+        start = cursor(path) if cursor is not None else None
+        fresh = PriceStore(loader(path), source=path, mtime=mtime, cursor=start)
+        _stores[path] = fresh
+        if store is not None:
+            _notify(fresh, fresh.diff(store))
+    return fresh
+
+
+def clear_price_stores():
+    with _lock:
+        _stores.clear()
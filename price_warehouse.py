@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import pandas as pd
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+PRICE_DB = os.environ.get("PRICE_DB", "prices.db")
+
+# Same columns as "Daily Price (1).csv"
+COLUMNS = [
+    "District", "Market", "Commodity Group", "Commodity", "Variety", "Grade",
+    "Min Price", "Max Price", "Modal Price", "Price Unit", "Price Date",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    "District"        TEXT,
+    "Market"          TEXT NOT NULL,
+    "Commodity Group" TEXT,
+    "Commodity"       TEXT NOT NULL,
+    "Variety"         TEXT,
+    "Grade"           TEXT,
+    "Min Price"       REAL,
+    "Max Price"       REAL,
+    "Modal Price"     REAL NOT NULL,
+    "Price Unit"      TEXT,
+    "Price Date"      TEXT NOT NULL,            -- ISO YYYY-MM-DD
+    commodity_key     TEXT NOT NULL             -- lower(Commodity)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS prices_row
+    ON prices (commodity_key, "Market", "Variety", "Grade", "Price Date");
+CREATE INDEX IF NOT EXISTS prices_market ON prices ("Market");
+CREATE INDEX IF NOT EXISTS prices_date ON prices ("Price Date");
+"""
+
+# Part of the row key; stored as '' (not NULL) so the unique index sees
+# "no variety" as one value and re-ingesting a row is a no-op
+_KEY_TEXT = ["Variety", "Grade"]
+SCHEMA_VERSION = 1
+
+# Version 0 stored NULL and so could hold duplicate rows: keep the first
+_MIGRATE_V1 = """
+DELETE FROM prices WHERE rowid NOT IN (
+    SELECT MIN(rowid) FROM prices
+    GROUP BY commodity_key, "Market", COALESCE("Variety", ''), COALESCE("Grade", ''), "Price Date"
+);
+UPDATE prices SET "Variety" = COALESCE("Variety", ''), "Grade" = COALESCE("Grade", '')
+    WHERE "Variety" IS NULL OR "Grade" IS NULL;
+PRAGMA user_version = 1;
+"""
+
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_schema(conn, db_path):
+    """Create / migrate the schema, once per database per process."""
+    key = os.path.abspath(db_path)
+    if key in _schema_ready:
+        return
+    with _schema_lock:
+        if key in _schema_ready:
+            return
+        conn.executescript(_SCHEMA)
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.executescript(f"BEGIN; {_MIGRATE_V1} COMMIT;")
+        _schema_ready.add(key)
+
+
+def connect(db_path=PRICE_DB, readonly=False):
+    """
+    Writer connection (schema ensured), or with readonly=True a plain
+    read-only one for the request path that never creates or alters.
+    """
+    # Default rollback journal (not WAL): commits touch the main file,
+    # so readers can detect new rows from its mtime.
+    if readonly:
+        uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        return sqlite3.connect(uri, uri=True)
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn, db_path)
+    return conn
+
+
+@contextmanager
+def _db(db_path, readonly=True):
+    """Connection that commits on success and is always closed."""
+    conn = connect(db_path, readonly=readonly)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _normalize(df):
+    """Cleaned rows in warehouse form (drops rows the agents can't use)."""
+    df = df.reindex(columns=COLUMNS).copy()
+    if not pd.api.types.is_datetime64_any_dtype(df["Price Date"]):
+        df["Price Date"] = pd.to_datetime(
+            df["Price Date"], format="%d-%m-%Y", errors="coerce"
+        )
+    for col in ("Min Price", "Max Price", "Modal Price"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df = df.dropna(subset=["Price Date", "Modal Price", "Commodity", "Market"])
+    df[_KEY_TEXT] = df[_KEY_TEXT].fillna("")
+    df["Price Date"] = df["Price Date"].dt.strftime("%Y-%m-%d")
+    df["commodity_key"] = df["Commodity"].str.lower()
+    return df
+
+
+def append_rows(df, db_path=PRICE_DB):
+    """
+    Append price rows; rows already present (same commodity, market,
+    variety, grade and date) are skipped. Returns the number inserted.
+    """
+    rows = _normalize(df)
+    if rows.empty:
+        return 0
+
+    cols = COLUMNS + ["commodity_key"]
+    sql = 'INSERT OR IGNORE INTO prices ({}) VALUES ({})'.format(
+        ", ".join(f'"{c}"' for c in cols), ", ".join("?" * len(cols))
+    )
+    records = rows[cols].astype(object).where(rows[cols].notna(), None)
+    with _db(db_path, readonly=False) as conn:
+        before = conn.total_changes
+        conn.executemany(sql, records.itertuples(index=False, name=None))
+        return conn.total_changes - before
+
+
+def import_csv(csv_path, db_path=PRICE_DB):
+    """Seed the warehouse from a price CSV."""
+    return append_rows(pd.read_csv(csv_path), db_path)
+
+
+def latest_rowid(db_path=PRICE_DB):
+    """Highest rowid so far; rows are append-only, so this is a cursor."""
+    with _db(db_path) as conn:
+        return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM prices").fetchone()[0]
+
+
+def load_prices(db_path=PRICE_DB, since=None, after_rowid=None):
+    """
+    Warehouse rows as a frame shaped like load_and_clean_data's output
+    (parsed Price Date, numeric prices). `since` limits to newer dates,
+    `after_rowid` to rows appended after that cursor.
+    """
+    query = "SELECT {} FROM prices".format(", ".join(f'"{c}"' for c in COLUMNS))
+    where, params = [], []
+    if since is not None:
+        where.append('"Price Date" > ?')
+        params.append(pd.Timestamp(since).strftime("%Y-%m-%d"))
+    if after_rowid is not None:
+        where.append("rowid > ?")
+        params.append(int(after_rowid))
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    with _db(db_path) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+    for col in _KEY_TEXT:
+        df[col] = df[col].mask(df[col] == "")  # back to NaN, as in the CSV
+    df["Price Date"] = pd.to_datetime(df["Price Date"], format="%Y-%m-%d")
+    return df
+
+
+def load_delta(db_path, cursor):
+    """delta_loader for get_price_store: rows appended since `cursor`."""
+    end = latest_rowid(db_path)
+    if cursor is None or end < cursor:
+        return None
+    return load_prices(db_path, after_rowid=cursor), end
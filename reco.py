@@ -1,142 +1,46 @@
+import os
+import time
 
+import numpy as np
+import pandas as pd
 
-import requests
+from advice_i18n import DEFAULT_LANGUAGE, get_templates
+from reco_rules import get_rule_table
+from telemetry import traced
+from weather import get_weather_provider
 
-def get_weather(city: str, api_key: str):
-    """Fetch real-time weather data safely."""
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "q": city,
-        "appid": api_key,
-        "units": "metric"
-    }
+@traced("weather")
+def get_weather(city: str, api_key: str, units: str = "metric"):
+    """Fetch real-time weather data safely (pooled + TTL cached)."""
+    return get_weather_provider().get(city, api_key, units)
 
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()  # catches 401, 403, 404
-
-        data = response.json()
-
-        return {
-            "temperature": data["main"]["temp"],
-            "humidity": data["main"]["humidity"],
-            "rain": "rain" in data,
-            "wind_speed": data["wind"]["speed"],
-            "description": data["weather"][0]["description"],
-            "source": "live"
-        }
-
-    except Exception as e:
-        return {
-            "temperature": None,
-            "humidity": None,
-            "rain": False,
-            "wind_speed": None,
-            "description": "Unavailable",
-            "source": "offline",
-            "error": str(e)
-        }
-print(get_weather("Adilabad", "22add7525c95278176e23268d8fd34ab"))
-
-
-def recommendation_agent(agent1, agent2, agent3, weather):
-    advice = []
-
-    # -----------------------------
-    # Crop Health Logic
-    # -----------------------------
-    if agent2["health_status"] == "Diseased_moderate":
-        advice.append(
-            "⚠️ Moderate disease detected. Apply recommended fungicide or bactericide immediately "
-            "and remove heavily infected leaves to prevent spread."
-        )
-    elif agent2["health_status"] == "Diseased_mild":
-        advice.append(
-            "🩺 Mild disease detected. Apply preventive spray and continue monitoring crop health."
-        )
-    else:
-        advice.append("✅ Crop health is good. Maintain regular monitoring and nutrition.")
-
-    # -----------------------------
-    # Weather-based Risk
-    # -----------------------------
-    if weather.get("source") == "live":
-        if weather["humidity"] > 70 and weather["rain"]:
-            advice.append(
-                "🌧️ High humidity and rainfall increase disease risk. Avoid irrigation and apply protective fungicide."
-            )
-        if weather["temperature"] > 35:
-            advice.append(
-                "🌡️ High temperature detected. Avoid spraying during midday; spray early morning or evening."
-            )
-    else:
-        advice.append("⚠️ Weather data unavailable. Advice based on crop and market conditions only.")
-
-    # -----------------------------
-    # Field Condition
-    # -----------------------------
-    if agent1["weed_percentage"] > 20:
-        advice.append(
-            "🌿 High weed infestation detected. Mechanical weeding or selective herbicide application is advised."
-        )
 
-    # -----------------------------
-    # Market Insight
-    # -----------------------------
-    advice.append(f"📈 Market insight: {agent3['recommendation']}")
-
-    # -----------------------------
-    # DETAILED FINAL DECISION (ENHANCED)
-    # -----------------------------
-    decision_parts = []
-
-    # Weather influence
-    if weather.get("source") == "live":
-        decision_parts.append(
-            f"The current weather shows a temperature of {weather['temperature']}°C "
-            f"with {weather['humidity']}% humidity and {weather['description']} conditions."
-        )
-
-        if weather["rain"]:
-            decision_parts.append(
-                "Rainfall increases the risk of disease spread and post-harvest losses."
-            )
-        else:
-            decision_parts.append(
-                "Dry weather conditions are favorable for crop protection and harvesting activities."
-            )
-
-    # Crop health influence
-    if agent2["health_status"] == "Diseased_mild":
-        decision_parts.append(
-            "Since the disease level is mild, timely preventive treatment can restore crop health."
-        )
-    elif agent2["health_status"] == "Diseased_moderate":
-        decision_parts.append(
-            "Due to moderate disease severity, immediate treatment is critical before harvest."
-        )
-    else:
-        decision_parts.append(
-            "The crop is healthy, which supports better yield and market quality."
-        )
+def _farm_record(agent1, agent2, agent3, weather):
+    """The flat fields the rule table and templates read for one farm."""
+    return {
+        "health_status": agent2["health_status"],
+        "weed_percentage": agent1["weed_percentage"],
+        "weather_source": weather.get("source"),
+        "humidity": weather.get("humidity"),
+        "temperature": weather.get("temperature"),
+        "rain": weather.get("rain"),
+        "description": weather.get("description"),
+        "market_recommendation": agent3["recommendation"],
+    }
 
-    # Weed influence
-    if agent1["weed_percentage"] > 20:
-        decision_parts.append(
-            "Weed pressure is high and should be controlled to avoid yield reduction."
-        )
 
-    # Market influence
-    if "WAIT" in agent3["recommendation"]:
-        decision_parts.append(
-            "Market trends indicate rising prices, so delaying harvest may increase profitability."
-        )
-    else:
-        decision_parts.append(
-            "Market prices may decline, so early harvest and selling is advisable."
-        )
+@traced("recommendation")
+def recommendation_agent(agent1, agent2, agent3, weather, language=DEFAULT_LANGUAGE):
+    farm = _farm_record(agent1, agent2, agent3, weather)
+    table = get_rule_table()
+    advice_keys, decision_keys = table.resolve(table.mask(farm))
 
-    final_decision = " ".join(decision_parts)
+    # Advice / decision text in the farmer's language (English, Hindi, Telugu)
+    templates = get_templates(language)
+    advice = [templates["advice"][key].render(farm) for key in advice_keys]
+    final_decision = " ".join(
+        templates["decision"][key].render(farm) for key in decision_keys
+    )
 
     return {
         "crop": agent3.get("crop", "Unknown"),
@@ -148,3 +52,140 @@ def recommendation_agent(agent1, agent2, agent3, weather):
     }
 
 
+# -----------------------------
+# Batch mode (columnar farm roster)
+# -----------------------------
+FARM_COLUMNS = [
+    "health_status", "weed_percentage", "weather_source", "humidity",
+    "temperature", "rain", "description", "market_recommendation",
+]
+
+
+def farms_frame(rows):
+    """Columnar farm roster from (agent1, agent2, agent3, weather) tuples."""
+    records = []
+    for agent1, agent2, agent3, weather in rows:
+        record = _farm_record(agent1, agent2, agent3, weather)
+        record.update(
+            crop=agent3.get("crop", "Unknown"),
+            best_mandi=agent3.get("best_mandi", "Not available"),
+            expected_price=agent3.get("predicted_price", "N/A"),
+        )
+        records.append(record)
+    # object dtype keeps ints as ints, so "30°C" doesn't become "30.0°C"
+    return pd.DataFrame(records, columns=FARM_COLUMNS + [
+        "crop", "best_mandi", "expected_price"
+    ], dtype=object)
+
+
+def _per_farm(columns, rows):
+    """Rendered template columns → one tuple of strings per farm."""
+    return zip(*columns) if columns else [()] * len(rows)
+
+
+@traced("recommendation.batch")
+def recommendation_batch(farms, language=DEFAULT_LANGUAGE):
+    """
+    recommendation_agent over a whole farm roster.
+
+    farms : DataFrame or dict of columns (see FARM_COLUMNS); crop,
+            best_mandi and expected_price pass through when present.
+    Conditions are evaluated as column masks; farms sharing a condition
+    mask share one rule resolution and have their templates rendered
+    together. Returns a frame with one row per farm whose detailed_advice
+    and final_recommendation match recommendation_agent exactly (numbers
+    are formatted as they appear in the input columns).
+    """
+    df = pd.DataFrame(farms)
+    n = len(df)
+    index = df.index
+    table = get_rule_table()
+    templates = get_templates(language)
+    masks = table.masks(df)
+
+    advice = np.empty(n, dtype=object)
+    final = np.empty(n, dtype=object)
+    for mask in np.unique(masks).tolist():
+        rows = np.flatnonzero(masks == mask)
+        group = df.iloc[rows]
+        advice_keys, decision_keys = table.resolve(mask)
+
+        lines = [templates["advice"][key].render_column(group) for key in advice_keys]
+        parts = [templates["decision"][key].render_column(group) for key in decision_keys]
+        for i, farm_lines, farm_parts in zip(rows, _per_farm(lines, rows), _per_farm(parts, rows)):
+            advice[i] = list(farm_lines)
+            final[i] = " ".join(farm_parts)
+
+    def column(name, default):
+        return df[name] if name in df else pd.Series([default] * n, index=index, dtype=object)
+
+    return pd.DataFrame({
+        "crop": column("crop", "Unknown"),
+        "best_mandi": column("best_mandi", "Not available"),
+        "expected_price": column("expected_price", "N/A"),
+        "detailed_advice": pd.Series(advice, index=index, dtype=object),
+        "final_recommendation": pd.Series(final, index=index, dtype=object),
+    }, index=index)
+
+
+def check_batch_parity(n=20000, seed=0, language=DEFAULT_LANGUAGE):
+    """
+    Random farm roster through both paths; "ok" is True when every
+    farm's advice and final recommendation match recommendation_agent.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        live = rng.random() < 0.8
+        weather = {"source": "live" if live else "offline"}
+        if live:
+            weather.update(
+                temperature=round(float(rng.uniform(15, 45)), 1) if rng.random() < 0.5
+                else int(rng.integers(15, 45)),
+                humidity=int(rng.integers(20, 100)),
+                rain=bool(rng.random() < 0.3),
+                description=str(rng.choice(["clear sky", "light rain", "haze"])),
+            )
+        rows.append((
+            {"weed_percentage": round(float(rng.uniform(0, 60)), 2)},
+            {"health_status": str(rng.choice(
+                ["Healthy", "Diseased_mild", "Diseased_moderate", "Unavailable"]
+            ))},
+            {"crop": "Tomato", "best_mandi": "Bowenpally", "predicted_price": 1500.0,
+             "recommendation": str(rng.choice([
+                 "WAIT – Prices likely to increase", "SELL NOW – Prices may fall",
+                 "Market data unavailable",
+             ]))},
+            weather,
+        ))
+
+    start = time.perf_counter()
+    single = [recommendation_agent(*row, language=language) for row in rows]
+    single_s = time.perf_counter() - start
+
+    farms = farms_frame(rows)
+    start = time.perf_counter()
+    batch = recommendation_batch(farms, language=language)
+    batch_s = time.perf_counter() - start
+
+    mismatches = [
+        i for i, (one, adv, fin) in enumerate(zip(
+            single, batch["detailed_advice"], batch["final_recommendation"]
+        ))
+        if one["detailed_advice"] != adv or one["final_recommendation"] != fin
+    ]
+    return {
+        "farms": n,
+        "single_s": round(single_s, 3),
+        "batch_s": round(batch_s, 3),
+        "mismatches": mismatches[:10],
+        "ok": not mismatches,
+    }
+
+
+# -----------------------------
+# Local test only
+# -----------------------------
+if __name__ == "__main__":
+    print(get_weather("Adilabad", os.environ.get("OPENWEATHER_API_KEY", "")))
+    print(check_batch_parity())
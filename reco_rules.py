@@ -0,0 +1,200 @@
+import json
+import logging
+import operator
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from advice_i18n import LANGUAGES, get_templates
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+RECO_RULES = os.environ.get("RECO_RULES", os.path.join(BASE_PATH, "reco_rules.json"))
+
+_COMPARE = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+OPS = set(_COMPARE) | {"truthy", "contains"}
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# CONDITIONS
+# -------------------------------------------------
+def _test(cond, value):
+    """One condition against one farm's field value."""
+    op = cond["op"]
+    if op == "truthy":
+        return bool(value)
+    if op == "contains":
+        return value is not None and cond["value"] in str(value)
+    try:
+        return bool(_COMPARE[op](value, cond["value"]))
+    except TypeError:
+        return False  # missing / non-numeric field
+
+
+def _test_column(cond, df):
+    """One condition over a farm roster → bool array."""
+    n = len(df)
+    if cond["field"] not in df:
+        return np.zeros(n, dtype=bool)
+    col = df[cond["field"]]
+    op = cond["op"]
+    if op == "truthy":
+        return col.fillna(False).astype(bool).to_numpy()
+    if op == "contains":
+        return col.astype(str).str.contains(cond["value"], regex=False).to_numpy() & col.notna().to_numpy()
+    if isinstance(cond["value"], (int, float)) and op not in ("==", "!="):
+        col = pd.to_numeric(col, errors="coerce")
+    return _COMPARE[op](col, cond["value"]).fillna(False).to_numpy(dtype=bool)
+
+
+# -------------------------------------------------
+# COMPILED RULE TABLE
+# -------------------------------------------------
+class RuleTable:
+    """
+    Declarative recommendation rules compiled to bitmasks.
+
+    Every named condition gets one bit; a farm is reduced to the mask of
+    conditions it satisfies. Each rule is a (require, forbid) mask pair,
+    evaluated in priority order; within a group only the first matching
+    rule fires (if/elif/else). The message keys for a mask are memoized,
+    so with N conditions there are at most 2**N distinct resolutions.
+    """
+
+    def __init__(self, spec):
+        self.conditions = []
+        for name, cond in spec["conditions"].items():
+            if cond.get("op") not in OPS:
+                raise ValueError(f"Condition {name!r}: unknown op {cond.get('op')!r}")
+            if "field" not in cond:
+                raise ValueError(f"Condition {name!r}: missing field")
+            self.conditions.append((name, cond))
+        self.bits = {name: 1 << i for i, (name, _) in enumerate(self.conditions)}
+
+        self.advice = self._compile(spec.get("advice", []))
+        self.decision = self._compile(spec.get("decision", []))
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, rules):
+        compiled = []
+        for rule in sorted(rules, key=lambda r: r.get("priority", 0)):
+            require = forbid = 0
+            for name in rule.get("when", []):
+                bit = self.bits.get(name.lstrip("!"))
+                if bit is None:
+                    raise ValueError(f"Rule {rule.get('message')!r}: unknown condition {name!r}")
+                if name.startswith("!"):
+                    forbid |= bit
+                else:
+                    require |= bit
+            compiled.append((require, forbid, rule.get("group"), rule["message"]))
+        return compiled
+
+    @staticmethod
+    def _select(compiled, mask):
+        keys, fired = [], set()
+        for require, forbid, group, message in compiled:
+            if group is not None and group in fired:
+                continue
+            if mask & require == require and not mask & forbid:
+                keys.append(message)
+                if group is not None:
+                    fired.add(group)
+        return tuple(keys)
+
+    def mask(self, farm):
+        """Condition bitmask for one farm (dict of field values)."""
+        mask = 0
+        for name, cond in self.conditions:
+            if _test(cond, farm.get(cond["field"])):
+                mask |= self.bits[name]
+        return mask
+
+    def masks(self, df):
+        """Condition bitmasks for a farm roster, one int64 per row."""
+        masks = np.zeros(len(df), dtype=np.int64)
+        for name, cond in self.conditions:
+            masks |= np.where(_test_column(cond, df), self.bits[name], 0)
+        return masks
+
+    def resolve(self, mask):
+        """(advice keys, decision keys) for a condition bitmask."""
+        hit = self._resolved.get(mask)
+        if hit is None:
+            hit = (self._select(self.advice, mask), self._select(self.decision, mask))
+            with self._lock:
+                self._resolved[mask] = hit
+        return hit
+
+    def messages(self):
+        """Every message key the rules can emit, per section."""
+        return {
+            "advice": {rule[3] for rule in self.advice},
+            "decision": {rule[3] for rule in self.decision},
+        }
+
+
+def check_templates(table):
+    """ValueError unless every message key has a template in every language."""
+    for language in LANGUAGES:
+        templates = get_templates(language)
+        for section, keys in table.messages().items():
+            missing = sorted(keys - set(templates[section]))
+            if missing:
+                raise ValueError(f"No {language} {section} template for {missing}")
+
+
+def load_rule_table(path=RECO_RULES):
+    with open(path, encoding="utf-8") as f:
+        table = RuleTable(json.load(f))
+    check_templates(table)
+    return table
+
+
+# -------------------------------------------------
+# HOT RELOAD
+# -------------------------------------------------
+_table = None
+_table_mtime = None
+_table_lock = threading.Lock()
+
+
+def get_rule_table(path=RECO_RULES):
+    """
+    Shared compiled rule table, recompiled when the file's mtime changes.
+    A broken edit keeps the last good table (and is logged) instead of
+    failing requests.
+    """
+    global _table, _table_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        if _table is None:
+            raise
+        return _table
+
+    if mtime != _table_mtime:
+        with _table_lock:
+            if mtime != _table_mtime:
+                try:
+                    _table = load_rule_table(path)
+                except (OSError, ValueError, KeyError) as e:
+                    if _table is None:
+                        raise
+                    log.warning("Keeping previous rules, %s is invalid: %s", path, e)
+                _table_mtime = mtime
+    return _table
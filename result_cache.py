@@ -0,0 +1,156 @@
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")  # None → memory only
+
+
+# -------------------------------------------------
+# HASHING
+# -------------------------------------------------
+_file_hashes = {}
+_file_hash_lock = threading.Lock()
+
+
+def file_hash(path):
+    """sha256 of a file, recomputed only when its mtime or size changes."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _file_hash_lock:
+        hit = _file_hashes.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    with _file_hash_lock:
+        _file_hashes[path] = (stamp, digest)
+    return digest
+
+
+def image_hash(image):
+    """sha256 of an image given as a path, encoded bytes or an array."""
+    h = hashlib.sha256()
+    if isinstance(image, np.ndarray):
+        h.update(str((image.shape, image.dtype.str)).encode())
+        h.update(np.ascontiguousarray(image).data)
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        h.update(image)
+    else:
+        with open(image, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+# -------------------------------------------------
+# RESULT CACHE
+# -------------------------------------------------
+class ResultCache:
+    """
+    Content-addressed agent results: key = (agent, image hash, model hash).
+
+    The model hash is the one the model registry recorded when it loaded
+    the model in use, so replacing a model file makes old results stop
+    matching only once the new model is actually serving. An in-memory
+    LRU sits in front of an optional on-disk tier.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, cache_dir=RESULT_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, agent, image, model_hash):
+        """`model_hash` from ModelRegistry.get_with_hash for the model in use."""
+        return f"{agent}-{model_hash[:16]}-{image_hash(image)}"
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+
+        if value is None:
+            value = self._read(key)
+            if value is not None:
+                self._remember(key, value)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        self._write(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ---------- disk tier ----------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _read(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write(self, key, value):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+_cache = None
+
+
+def get_result_cache():
+    """Process-wide ResultCache."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
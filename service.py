@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import numpy as np
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from agent1 import _decode as _decode_field, run_agent1_batch
+from agent2 import run_agent2_batch
+from advice_i18n import resolve_language
+from agent3 import run_agent3
+from microbatch import DeadlineExceededError, MicroBatcher, QueueFullError
+from pipeline import fallback_output
+from reco import get_weather, recommendation_agent
+from startup import warm_up
+from telemetry import prometheus_text, span
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+DEADLINE_MS = float(os.environ.get("SERVICE_DEADLINE_MS", "15000"))
+MAX_IMAGE_BYTES = int(os.environ.get("SERVICE_MAX_IMAGE_MB", "20")) * 1024 * 1024
+OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
+
+
+# -------------------------------------------------
+# MICRO-BATCHED MODELS
+# -------------------------------------------------
+def _agent1_batch(images):
+    return run_agent1_batch(images, batch_size=len(images))["results"]
+
+
+def _agent2_batch(images):
+    return run_agent2_batch(images, batch_size=len(images))
+
+
+def _decode_leaf(image):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+# Images are decoded before they join a batch, so one bad upload is a 400
+# for its own request instead of failing every request batched with it
+_decoders = {"agent1": _decode_field, "agent2": _decode_leaf}
+
+def _batcher(batch_fn, name):
+    # Own thread, so decodes / Prophet fits / weather calls on the default
+    # pool can't hold up model batches
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"batch-{name}")
+    return MicroBatcher(batch_fn, name=name, executor=executor)
+
+
+batchers = {
+    "agent1": _batcher(_agent1_batch, "agent1"),
+    "agent2": _batcher(_agent2_batch, "agent2"),
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    warm_up()
+    for batcher in batchers.values():
+        batcher.start()
+    yield
+    for batcher in batchers.values():
+        await batcher.stop()
+        batcher.executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="Virtual Farm Manager advisory API", lifespan=lifespan)
+
+
+# -------------------------------------------------
+# HELPERS
+# -------------------------------------------------
+def _timeout(deadline_ms):
+    return (deadline_ms or DEADLINE_MS) / 1000
+
+
+async def _infer(agent, image, timeout):
+    """One image through the agent's micro-batcher, as HTTP errors."""
+    if not image:
+        raise HTTPException(400, f"{agent}: empty image")
+    if len(image) > MAX_IMAGE_BYTES:
+        raise HTTPException(413, f"{agent}: image larger than {MAX_IMAGE_BYTES} bytes")
+    try:
+        decoded = await asyncio.to_thread(_decoders[agent], image)
+    except Exception as e:  # PIL / OpenCV raise assorted types for bad data
+        raise HTTPException(400, f"{agent}: could not decode image ({type(e).__name__}: {e})")
+    try:
+        return await batchers[agent].submit(decoded, timeout)
+    except QueueFullError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "1"})
+    except DeadlineExceededError as e:
+        raise HTTPException(504, str(e))
+
+
+async def _in_thread(fn, *args, timeout, **kwargs):
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(504, f"{getattr(fn, '__name__', 'call')} deadline exceeded")
+
+
+def _b64(data, field):
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(400, f"{field} is not valid base64")
+
+
+# -------------------------------------------------
+# ENDPOINTS
+# -------------------------------------------------
+@app.post("/agent1")
+async def agent1(request: Request, deadline_ms: Optional[float] = Query(None)):
+    """Field image (raw bytes body) → Agent-1 output."""
+    return await _infer("agent1", await request.body(), _timeout(deadline_ms))
+
+
+@app.post("/agent2")
+async def agent2(request: Request, deadline_ms: Optional[float] = Query(None)):
+    """Leaf image (raw bytes body) → Agent-2 output."""
+    return await _infer("agent2", await request.body(), _timeout(deadline_ms))
+
+
+@app.get("/agent3")
+async def agent3(crop: str, district: Optional[str] = None, top_k: int = Query(5, ge=1),
+                 deadline_ms: Optional[float] = Query(None)):
+    try:
+        return await _in_thread(
+            run_agent3, crop, district=district, top_k=top_k, timeout=_timeout(deadline_ms)
+        )
+    except ValueError as e:  # no price data for the crop
+        raise HTTPException(404, str(e))
+
+
+@app.get("/weather")
+async def weather(city: str, api_key: Optional[str] = None,
+                  deadline_ms: Optional[float] = Query(None)):
+    key = api_key or OPENWEATHER_API_KEY
+    if not key:
+        raise HTTPException(400, "api_key is required (or set OPENWEATHER_API_KEY)")
+    return await _in_thread(get_weather, city, key, timeout=_timeout(deadline_ms))
+
+
+class RecommendationRequest(BaseModel):
+    agent1: dict
+    agent2: dict
+    agent3: dict
+    weather: dict
+    language: str = "English"
+
+
+@app.post("/recommendation")
+async def recommendation(req: RecommendationRequest):
+    try:
+        return recommendation_agent(
+            req.agent1, req.agent2, req.agent3, req.weather, language=req.language
+        )
+    except (KeyError, ValueError) as e:
+        raise HTTPException(422, f"{type(e).__name__}: {e}")
+
+
+class AdvisoryRequest(BaseModel):
+    crop: str
+    city: str
+    field_image: str              # base64
+    leaf_image: str               # base64
+    api_key: Optional[str] = None
+    language: str = "English"
+    deadline_ms: Optional[float] = None
+
+
+@app.post("/advisory")
+async def advisory(req: AdvisoryRequest = Body(...)):
+    """
+    Full advisory, like the Streamlit app: images go through the shared
+    micro-batchers, Agent-3 and weather run concurrently in threads. An
+    agent that fails or misses the deadline is replaced by its fallback.
+    """
+    try:
+        resolve_language(req.language)
+    except ValueError as e:
+        raise HTTPException(422, f"ValueError: {e}")
+    timeout = _timeout(req.deadline_ms)
+    key = req.api_key or OPENWEATHER_API_KEY
+    field_image = _b64(req.field_image, "field_image")
+    leaf_image = _b64(req.leaf_image, "leaf_image")
+
+    with span("service.advisory", crop=req.crop):
+        calls = {
+            "agent1": _infer("agent1", field_image, timeout),
+            "agent2": _infer("agent2", leaf_image, timeout),
+            "agent3": _in_thread(run_agent3, req.crop, timeout=timeout),
+        }
+        if key:
+            calls["weather"] = _in_thread(get_weather, req.city, key, timeout=timeout)
+
+        results = await asyncio.gather(*calls.values(), return_exceptions=True)
+        outputs, errors = {}, {}
+        for name, result in zip(calls, results):
+            if isinstance(result, HTTPException) and result.status_code == 503:
+                raise result  # shed load rather than answer with fallbacks
+            if isinstance(result, BaseException):
+                outputs[name] = fallback_output(name, req.crop)
+                errors[name] = getattr(result, "detail", None) or f"{type(result).__name__}: {result}"
+            else:
+                outputs[name] = result
+        outputs.setdefault("weather", fallback_output("weather", req.crop))
+
+        final = recommendation_agent(
+            outputs["agent1"], outputs["agent2"], outputs["agent3"], outputs["weather"],
+            language=req.language,
+        )
+    return {**outputs, "final": final, "errors": errors}
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok", "batchers": {name: b.stats() for name, b in batchers.items()}}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    lines = [prometheus_text()]
+    for name, b in batchers.items():
+        s = b.stats()
+        lines.append(
+            f'vfm_batch_queue_depth{{agent="{name}"}} {s["queued"]}\n'
+            f'vfm_batch_batches_total{{agent="{name}"}} {s["batches"]}\n'
+            f'vfm_batch_items_total{{agent="{name}"}} {s["items"]}\n'
+            f'vfm_batch_rejected_total{{agent="{name}"}} {s["rejected"]}\n'
+            f'vfm_batch_expired_total{{agent="{name}"}} {s["expired"]}\n'
+        )
+    return "".join(lines)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Advisory HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # One process owns the models; concurrency comes from the event loop
+    uvicorn.run(app, host=args.host, port=args.port, workers=1)
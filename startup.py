@@ -0,0 +1,120 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+APP_MODULES = ["pipeline", "agent1", "agent2", "agent3", "reco", "weather"]
+
+
+# -------------------------------------------------
+# IMPORT-TIME MEASUREMENT
+# -------------------------------------------------
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(modules=APP_MODULES):
+    """
+    Cold import cost of each module, measured in a fresh interpreter with
+    `python -X importtime`. Returns {module: seconds}, cumulative.
+    """
+    timings = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=here, capture_output=True, text=True,
+        )
+        for line in proc.stderr.splitlines():
+            m = _IMPORTTIME.match(line)
+            if m and m.group(4) == module:
+                timings[module] = int(m.group(2)) / 1e6
+        if proc.returncode != 0:
+            timings[module] = None
+    return timings
+
+
+# -------------------------------------------------
+# WARM-UP
+# -------------------------------------------------
+_warm_thread = None
+_warm_status = {}
+
+
+def _warm(name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        _warm_status[name] = round(time.perf_counter() - start, 3)
+    except Exception as e:
+        _warm_status[name] = f"failed: {e}"
+
+
+def _load_agent1():
+    from agent1 import _get_model
+    _get_model()
+
+
+def _load_agent2():
+    from agent2 import _load_resources
+    _load_resources()
+
+
+def _load_prices():
+    from agent3 import load_price_store
+    load_price_store()
+
+
+def _load_prophet():
+    import prophet  # noqa: F401  (cmdstan backend import is the slow part)
+
+
+WARM_STEPS = {
+    "agent1": _load_agent1,
+    "agent2": _load_agent2,
+    "prices": _load_prices,
+    "prophet": _load_prophet,
+}
+
+
+def warm_up(background=True, steps=None):
+    """
+    Preload models, the price store and Prophet so the first request
+    doesn't pay for them. Idempotent; with background=True it returns
+    immediately and loads in a daemon thread.
+    """
+    global _warm_thread
+    if _warm_thread is not None:
+        return _warm_thread
+
+    def run():
+        for name in steps or WARM_STEPS:
+            _warm(name, WARM_STEPS[name])
+
+    _warm_thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    _warm_thread.start()
+    if not background:
+        _warm_thread.join()
+    return _warm_thread
+
+
+def warm_up_status():
+    """{step: seconds or error} for finished warm-up steps."""
+    return dict(_warm_status)
+
+
+if __name__ == "__main__":
+    print("⏱️ Import times (cold, cumulative)")
+    for module, seconds in measure_imports().items():
+        shown = "failed" if seconds is None else f"{seconds * 1000:.1f} ms"
+        print(f"{module:>10}: {shown}")
+
+    start = time.perf_counter()
+    warm_up(background=False)
+    print(f"\n🔥 Warm-up ({time.perf_counter() - start:.1f}s)")
+    for name, result in warm_up_status().items():
+        print(f"{name:>10}: {result}")
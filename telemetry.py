@@ -0,0 +1,408 @@
+import contextvars
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+TELEMETRY = os.environ.get("TELEMETRY", "0").lower() not in ("", "0", "false", "no")
+SERVICE_NAME = os.environ.get("TELEMETRY_SERVICE", "virtual-farm-manager")
+PROFILE_RATE = float(os.environ.get("TELEMETRY_PROFILE_RATE", "0"))   # fraction of requests
+PROFILE_INTERVAL = float(os.environ.get("TELEMETRY_PROFILE_INTERVAL_MS", "5")) / 1000
+SLOW_REQUEST_S = float(os.environ.get("TELEMETRY_SLOW_S", "5"))
+PROFILE_DIR = os.environ.get("TELEMETRY_PROFILE_DIR")
+
+SPAN_BUFFER = 2048          # finished spans kept for export
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Caches that count hits/misses, read at export time: name → (module, getter)
+CACHE_SOURCES = {
+    "agent_results": ("result_cache", "get_result_cache"),
+    "forecasts": ("forecast_cache", "get_forecast_cache"),
+    "weather": ("weather", "get_weather_provider"),
+}
+
+_enabled = TELEMETRY
+_current = contextvars.ContextVar("telemetry_span", default=None)
+_lock = threading.Lock()
+_histograms = {}
+_errors = Counter()
+_finished = deque(maxlen=SPAN_BUFFER)
+slow_profiles = deque(maxlen=20)
+
+
+def enable(on=True):
+    """Turn span recording on or off at runtime (TELEMETRY=1 at start)."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    """Drop recorded spans and metrics."""
+    with _lock:
+        _histograms.clear()
+        _errors.clear()
+        _finished.clear()
+    slow_profiles.clear()
+
+
+# -------------------------------------------------
+# SPANS
+# -------------------------------------------------
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """One timed stage; nests under the span active in this context."""
+
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id",
+                 "start_ns", "end_ns", "error", "_t0", "_token")
+
+    def __init__(self, name, attrs):
+        parent = _current.get()
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = os.urandom(8).hex()
+        self.error = None
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        self.end_ns = self.start_ns + int(duration * 1e9)
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _record(self, duration)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _record(span, duration):
+    with _lock:
+        hist = _histograms.get(span.name)
+        if hist is None:
+            hist = _histograms[span.name] = _Histogram()
+        hist.observe(duration)
+        if span.error:
+            _errors[span.name] += 1
+        _finished.append(span)
+
+
+def span(name, **attrs):
+    """
+    Context manager timing a stage. When telemetry is disabled this is a
+    shared no-op object, so instrumented code pays one flag check.
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def traced(name):
+    """Decorator form of span(name)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    return _current.get()
+
+
+# -------------------------------------------------
+# SLOW-REQUEST PROFILING (sampled)
+# -------------------------------------------------
+class StackSampler:
+    """
+    Samples the stacks of all threads every `interval` seconds and counts
+    them in collapsed form ("outer;inner;leaf" → n), the flamegraph.pl /
+    speedscope input format. Covers the agent worker threads too, which a
+    cProfile hook on the request thread would not see.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="telemetry-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common())
+
+
+@contextmanager
+def profile_request(name="request", **attrs):
+    """
+    Root span for one request. A TELEMETRY_PROFILE_RATE fraction of
+    requests also run under a StackSampler; those slower than
+    TELEMETRY_SLOW_S keep their profile in `slow_profiles` (and in
+    TELEMETRY_PROFILE_DIR when set). Usable as a decorator.
+    """
+    if not _enabled:
+        yield _NOOP
+        return
+
+    sampler = None
+    if PROFILE_RATE and random.random() < PROFILE_RATE:
+        sampler = StackSampler().start()
+    try:
+        with Span(name, attrs) as root:
+            yield root
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            if root.duration >= SLOW_REQUEST_S:
+                _keep_profile(root, sampler)
+
+
+def _keep_profile(root, sampler):
+    profile = {
+        "trace_id": root.trace_id,
+        "name": root.name,
+        "duration_s": round(root.duration, 3),
+        "collapsed": sampler.collapsed(),
+    }
+    slow_profiles.append(profile)
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{root.name}-{root.trace_id}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profile["collapsed"])
+
+
+# -------------------------------------------------
+# CACHE METRICS
+# -------------------------------------------------
+def cache_stats():
+    """{cache: (hits, misses)} for the caches loaded in this process."""
+    stats = {}
+    for name, (module, getter) in CACHE_SOURCES.items():
+        mod = sys.modules.get(module)
+        if mod is not None:
+            cache = getattr(mod, getter)()
+            stats[name] = (cache.hits, cache.misses)
+
+    advice = sys.modules.get("advice_i18n")
+    if advice is not None:
+        info = advice.render_cache_info()
+        stats["advice_render"] = (info.hits, info.misses)
+    return stats
+
+
+# -------------------------------------------------
+# EXPORT
+# -------------------------------------------------
+def _snapshot():
+    with _lock:
+        hists = {
+            name: (list(h.counts), h.count, h.sum) for name, h in _histograms.items()
+        }
+        return hists, dict(_errors), list(_finished)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    hists, errors, _ = _snapshot()
+    lines = [
+        "# HELP vfm_stage_duration_seconds Time spent in each traced stage.",
+        "# TYPE vfm_stage_duration_seconds histogram",
+    ]
+    for name, (counts, count, total) in sorted(hists.items()):
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), counts):
+            cumulative += n
+            lines.append(
+                f'vfm_stage_duration_seconds_bucket{{stage="{_label(name)}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(f'vfm_stage_duration_seconds_sum{{stage="{_label(name)}"}} {total:.6f}')
+        lines.append(f'vfm_stage_duration_seconds_count{{stage="{_label(name)}"}} {count}')
+
+    lines += [
+        "# HELP vfm_stage_errors_total Stages that raised.",
+        "# TYPE vfm_stage_errors_total counter",
+    ]
+    for name, n in sorted(errors.items()):
+        lines.append(f'vfm_stage_errors_total{{stage="{_label(name)}"}} {n}')
+
+    caches = cache_stats()
+    for kind, i in (("hits", 0), ("misses", 1)):
+        lines += [
+            f"# HELP vfm_cache_{kind}_total Cache {kind}.",
+            f"# TYPE vfm_cache_{kind}_total counter",
+        ]
+        for name, counts in sorted(caches.items()):
+            lines.append(f'vfm_cache_{kind}_total{{cache="{name}"}} {counts[i]}')
+    return "\n".join(lines) + "\n"
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otel_attributes(attrs):
+    return [{"key": k, "value": _otel_value(v)} for k, v in attrs.items()]
+
+
+def _otel_resource():
+    return {"attributes": _otel_attributes({"service.name": SERVICE_NAME})}
+
+
+def otlp_traces():
+    """Finished spans as an OTLP/JSON ExportTraceServiceRequest body."""
+    _, _, finished = _snapshot()
+    spans = []
+    for s in finished:
+        item = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _otel_attributes(s.attrs),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        spans.append(item)
+    return {"resourceSpans": [{
+        "resource": _otel_resource(),
+        "scopeSpans": [{"scope": {"name": "telemetry"}, "spans": spans}],
+    }]}
+
+
+def otlp_metrics():
+    """Stage histograms and cache counters as an OTLP/JSON metrics body."""
+    hists, errors, _ = _snapshot()
+    now = str(time.time_ns())
+    stage_points = [
+        {
+            "attributes": _otel_attributes({"stage": name}),
+            "timeUnixNano": now,
+            "count": str(count),
+            "sum": total,
+            "bucketCounts": [str(n) for n in counts],
+            "explicitBounds": list(BUCKETS),
+        }
+        for name, (counts, count, total) in sorted(hists.items())
+    ]
+
+    def counter(name, points):
+        return {"name": name, "sum": {
+            "dataPoints": points, "aggregationTemporality": 2, "isMonotonic": True,
+        }}
+
+    caches = cache_stats()
+    metrics = [
+        {"name": "vfm.stage.duration", "unit": "s", "histogram": {
+            "dataPoints": stage_points, "aggregationTemporality": 2,
+        }},
+        counter("vfm.stage.errors", [
+            {"attributes": _otel_attributes({"stage": name}), "timeUnixNano": now, "asInt": str(n)}
+            for name, n in sorted(errors.items())
+        ]),
+        counter("vfm.cache.hits", [
+            {"attributes": _otel_attributes({"cache": name}), "timeUnixNano": now, "asInt": str(h)}
+            for name, (h, _) in sorted(caches.items())
+        ]),
+        counter("vfm.cache.misses", [
+            {"attributes": _otel_attributes({"cache": name}), "timeUnixNano": now, "asInt": str(m)}
+            for name, (_, m) in sorted(caches.items())
+        ]),
+    ]
+    return {"resourceMetrics": [{
+        "resource": _otel_resource(),
+        "scopeMetrics": [{"scope": {"name": "telemetry"}, "metrics": metrics}],
+    }]}
@@ -0,0 +1,26 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# The agents are flat top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def copy_checkpoint(tmp_path_factory):
+    """
+    copy(model_path) → path of a temp copy, so exports / conversions are
+    written next to the copy and the repo's model gets no siblings.
+    Skips when the model file is not present.
+    """
+    def copy(model_path):
+        if not os.path.exists(model_path):
+            pytest.skip(f"{os.path.basename(model_path)} not present")
+        name = os.path.basename(model_path)
+        path = tmp_path_factory.mktemp(os.path.splitext(name)[0]) / name
+        shutil.copy(model_path, path)
+        return str(path)
+
+    return copy
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("ultralytics")
+
+import agent1_onnx
+from agent1 import MODEL_PATH, _load_yolo
+
+PROB_TOL = 0.05
+
+
+def _field_images(n=6, size=320, seed=0):
+    """Synthetic BGR field images: canopy greens with soil and weed patches."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(n):
+        img = np.empty((size, size, 3), dtype=np.uint8)
+        img[:] = (40 + 10 * i, 120 + 15 * i, 60)
+        for _ in range(8):
+            y, x = rng.integers(0, size - 40, 2)
+            img[y:y + 40, x:x + 40] = rng.integers(0, 256, 3)
+        noise = rng.integers(-20, 21, img.shape)
+        images.append(np.clip(img.astype(int) + noise, 0, 255).astype(np.uint8))
+    return images
+
+
+@pytest.fixture(scope="module")
+def checkpoint(copy_checkpoint):
+    return copy_checkpoint(MODEL_PATH)
+
+
+def test_onnx_matches_torch(checkpoint):
+    torch_model = _load_yolo(checkpoint)
+    onnx_model = agent1_onnx.load_onnx_classifier(checkpoint)
+
+    for img in _field_images():
+        t = torch_model(img, verbose=False)[0]
+        o = onnx_model(img)[0]
+        t_probs = t.probs.data.cpu().numpy()
+        assert o.probs.top1 == int(t.probs.top1)
+        assert np.max(np.abs(t_probs - o.probs.data)) <= PROB_TOL
+
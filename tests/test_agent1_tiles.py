@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import agent1_tiles
+from agent1_tiles import run_agent1_tiled, tile_starts
+
+
+def test_tile_starts_end_flush_with_edge():
+    assert tile_starts(10, 4, 0) == [0, 4, 6]
+    assert tile_starts(10, 4, 2) == [0, 2, 4, 6]
+    assert tile_starts(3, 4, 1) == [0]
+    assert tile_starts(4, 4, 1) == [0]
+    with pytest.raises(ValueError):
+        tile_starts(10, 4, 4)
+
+
+def _fake_agent1(monkeypatch, weeds, stages=None):
+    """Model yields the tiles' results in row-major order."""
+    results = iter(zip(weeds, stages or ["Vegetative"] * len(weeds)))
+    seen = []
+
+    def model(tiles, verbose=False):
+        seen.extend(t.shape for t in tiles)
+        return [next(results) for _ in tiles]
+
+    def summarize(result):
+        weed, stage = result
+        return {"field_label": "Crop", "confidence": 0.8,
+                "weed_percentage": weed, "crop_stage": stage}
+
+    monkeypatch.setattr(agent1_tiles, "_get_model", lambda path: model)
+    monkeypatch.setattr(agent1_tiles, "_summarize", summarize)
+    return seen
+
+
+def test_grid_and_area_weighted_weed_percentage(monkeypatch):
+    seen = _fake_agent1(monkeypatch, [0.0, 0.0, 90.0],
+                        ["Vegetative", "Flowering", "Flowering"])
+    out = run_agent1_tiled(np.zeros((4, 10, 3), np.uint8), tile_size=4, overlap=0, batch_size=2)
+
+    assert seen == [(4, 4, 3)] * 3
+    assert out["tiles"] == {"rows": 1, "cols": 3, "count": 3, "tile_size": 4,
+                            "overlap": 0, "image_size": [10, 4]}
+    assert out["weed_grid"] == [[0.0, 0.0, 90.0]]
+    assert out["stage_grid"] == [["Vegetative", "Flowering", "Flowering"]]
+    assert out["crop_stage"] == "Flowering"
+    # Columns 6-7 are covered by two tiles (0 and 90 → 45): (45*2 + 90*2) / 10
+    assert out["weed_percentage"] == 27.0
+    assert out["field"]["mean_weed_percentage"] == 30.0
+
+
+def test_small_image_is_one_clipped_tile(monkeypatch):
+    seen = _fake_agent1(monkeypatch, [12.5])
+    out = run_agent1_tiled(np.zeros((3, 5, 3), np.uint8), tile_size=8, overlap=2)
+    assert seen == [(3, 5, 3)]
+    assert out["weed_grid"] == [[12.5]]
+    assert out["weed_percentage"] == 12.5
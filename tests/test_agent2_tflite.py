@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+pytest.importorskip("tensorflow")
+
+import agent2_tflite
+from agent2 import IMG_SIZE, MODEL_PATH, _apply_policy, _load_class_names, _load_into, _load_keras
+
+PROB_TOL = 0.02
+
+
+def _leaf_images(n=6, seed=0):
+    """Synthetic RGB leaf images: green blades with brown lesion spots."""
+    rng = np.random.default_rng(seed)
+    h, w = IMG_SIZE
+    images = []
+    for i in range(n):
+        img = np.empty((h, w, 3), dtype=np.uint8)
+        img[:] = (50, 140 - 10 * i, 40)
+        for _ in range(i * 3):
+            y, x = rng.integers(0, h - 16, 2)
+            img[y:y + 16, x:x + 16] = (120, 80, 30)
+        noise = rng.integers(-15, 16, img.shape)
+        images.append(np.clip(img.astype(int) + noise, 0, 255).astype(np.uint8))
+    return images
+
+
+@pytest.fixture(scope="module")
+def checkpoint(copy_checkpoint):
+    return copy_checkpoint(MODEL_PATH)
+
+
+@pytest.mark.parametrize("quant", ["float32", "float16"])
+def test_tflite_matches_keras(checkpoint, quant):
+    images = _leaf_images()
+    buf = np.empty((len(images), *IMG_SIZE, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        _load_into(image, buf[i])
+
+    keras_model = _load_keras(checkpoint)
+    keras_probs = np.asarray(keras_model.predict_on_batch(buf))
+    lite_probs = agent2_tflite.load_tflite_model(checkpoint, quant, keras_model).predict_on_batch(buf)
+
+    assert np.array_equal(keras_probs.argmax(axis=1), lite_probs.argmax(axis=1))
+    assert np.max(np.abs(keras_probs - lite_probs)) <= PROB_TOL
+
+    class_names = _load_class_names()
+    statuses = [r["health_status"] for r in _apply_policy(keras_probs, class_names)]
+    assert statuses == [r["health_status"] for r in _apply_policy(lite_probs, class_names)]
+
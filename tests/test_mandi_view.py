@@ -0,0 +1,59 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from mandi_view import BestMandiView, get_best_mandi_view
+from price_store import PriceStore
+
+
+def _store(rows):
+    """(market, district, modal) rows for Tomato on one day."""
+    df = pd.DataFrame(
+        [("Tomato", m, d, "2024-01-01", p) for m, d, p in rows],
+        columns=["Commodity", "Market", "District", "Price Date", "Modal Price"],
+    )
+    df["Price Date"] = pd.to_datetime(df["Price Date"])
+    return PriceStore(df)
+
+
+ROWS = [
+    ("Bowenpally", "Hyderabad", 1200.0),
+    ("Gudimalkapur", "Hyderabad", 1400.0),
+    ("Jainath", "Adilabad", 1500.0),
+    ("Warangal", None, 1300.0),
+]
+COORDS = {
+    "bowenpally": (17.47, 78.48),
+    "gudimalkapur": (17.38, 78.43),
+    "jainath": (19.73, 78.59),
+}
+
+
+def test_top_k_ranks_by_latest_modal_price():
+    view = BestMandiView(_store(ROWS), coordinates={})
+    assert [r.market for r in view.top_k("tomato", 3)] == ["Jainath", "Gudimalkapur", "Warangal"]
+    assert view.best("Tomato") == ("Jainath", 1500.0)
+    assert view.top_k("Mango") == []
+    with pytest.raises(ValueError):
+        view.top_k("Tomato", 0)
+
+
+def test_district_filter_skips_missing_districts():
+    view = BestMandiView(_store(ROWS), coordinates={})
+    assert [r.market for r in view.top_k("Tomato", district="hyderabad")] == ["Gudimalkapur", "Bowenpally"]
+    assert all(d != "nan" for _, d in view._by_district)
+
+
+def test_radius_filter_needs_known_coordinates():
+    view = BestMandiView(_store(ROWS), coordinates=COORDS)
+    near = [r.market for r in view.top_k("Tomato", near=(17.4, 78.45), radius_km=50)]
+    assert near == ["Gudimalkapur", "Bowenpally"]
+    assert [r.market for r in view.top_k("Tomato", 1, near=(17.4, 78.45), radius_km=50)] == ["Gudimalkapur"]
+
+
+def test_each_store_gets_its_own_view():
+    a = _store(ROWS)
+    b = _store([("Bowenpally", "Hyderabad", 1000.0)])
+    assert get_best_mandi_view(a) is get_best_mandi_view(a)
+    assert get_best_mandi_view(a).best("Tomato")[0] == "Jainath"
+    assert get_best_mandi_view(b).best("Tomato")[0] == "Bowenpally"
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import pytest
+
+from microbatch import DeadlineExceededError, MicroBatcher, QueueFullError
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_submits_share_one_batch():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [2 * x for x in items]
+
+    async def main():
+        batcher = MicroBatcher(double, max_batch_size=8, window_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.submit(i, 5) for i in range(5)))
+        finally:
+            await batcher.stop()
+
+    assert _run(main()) == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_batches_close_at_max_size():
+    calls = []
+
+    def echo(items):
+        calls.append(len(items))
+        return items
+
+    async def main():
+        batcher = MicroBatcher(echo, max_batch_size=2, window_ms=50)
+        try:
+            await asyncio.gather(*(batcher.submit(i, 5) for i in range(5)))
+            return batcher.stats()
+        finally:
+            await batcher.stop()
+
+    stats = _run(main())
+    assert max(calls) == 2 and sum(calls) == 5
+    assert stats["items"] == 5 and stats["batches"] == len(calls)
+
+
+def test_full_queue_rejects_instead_of_waiting():
+    release = threading.Event()
+
+    def blocked(items):
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(blocked, max_batch_size=1, window_ms=0, max_queue=1)
+        try:
+            first = asyncio.ensure_future(batcher.submit("running", 5))
+            await asyncio.sleep(0.05)  # worker picked it up and is blocked
+            queued = asyncio.ensure_future(batcher.submit("queued", 5))
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError):
+                await batcher.submit("rejected", 5)
+            release.set()
+            return await asyncio.gather(first, queued), batcher.stats()["rejected"]
+        finally:
+            release.set()
+            await batcher.stop()
+
+    assert _run(main()) == (["running", "queued"], 1)
+
+
+def test_deadline_passes_while_queued():
+    release = threading.Event()
+    seen = []
+
+    def blocked(items):
+        seen.extend(items)
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(blocked, max_batch_size=1, window_ms=0)
+        try:
+            first = asyncio.ensure_future(batcher.submit("slow", 5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(DeadlineExceededError):
+                await batcher.submit("late", 0.05)
+            release.set()
+            await first
+            await asyncio.sleep(0.05)
+            return batcher.stats()["expired"]
+        finally:
+            release.set()
+            await batcher.stop()
+
+    assert _run(main()) == 1
+    assert seen == ["slow"]  # the expired request never reached the model
+
+
+def test_batch_errors_reach_every_caller():
+    def broken(items):
+        raise RuntimeError("model failed")
+
+    async def main():
+        batcher = MicroBatcher(broken, window_ms=20)
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(i, 5) for i in range(3)), return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    assert all(isinstance(r, RuntimeError) for r in _run(main()))
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+
+def _onnx(backend, checkpoint):
+    return backend.onnx_path(checkpoint), lambda: backend.load_onnx_classifier(checkpoint)
+
+
+def _tflite(backend, checkpoint):
+    return (backend.tflite_path(checkpoint, "float32"),
+            lambda: backend.load_tflite_model(checkpoint, "float32"))
+
+
+# backend module, its optional imports, export(backend, checkpoint) → (artifact, build)
+EXPORTS = [
+    pytest.param("agent1_onnx", ("numpy", "cv2", "onnxruntime", "ultralytics"), _onnx, id="onnx"),
+    pytest.param("agent2_tflite", ("numpy", "PIL", "tensorflow"), _tflite, id="tflite"),
+]
+
+
+@pytest.mark.parametrize("backend, deps, export", EXPORTS)
+def test_stale_export_is_rebuilt(backend, deps, export, copy_checkpoint):
+    for dep in deps:
+        pytest.importorskip(dep)
+    backend = pytest.importorskip(backend)
+    checkpoint = copy_checkpoint(backend.MODEL_PATH)
+    path, build = export(backend, checkpoint)
+
+    build()
+    assert not backend.is_stale(path, checkpoint)
+
+    later = os.path.getmtime(path) + 10
+    os.utime(checkpoint, (later, later))
+    assert backend.is_stale(path, checkpoint)
+
+    build()
+    assert not backend.is_stale(path, checkpoint)
@@ -0,0 +1,140 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from price_store import PriceStore, clear_price_stores, get_price_store
+
+
+def _frame(rows):
+    """(commodity, market, district, "YYYY-MM-DD", modal) rows → cleaned frame."""
+    df = pd.DataFrame(rows, columns=["Commodity", "Market", "District", "Price Date", "Modal Price"])
+    df["Price Date"] = pd.to_datetime(df["Price Date"])
+    return df
+
+
+ROWS = [
+    ("Tomato", "Bowenpally", "Hyderabad", "2024-01-02", 1200.0),
+    ("Tomato", "Bowenpally", "Hyderabad", "2024-01-01", 1100.0),
+    ("Tomato", "Jainath", "Adilabad", "2024-01-01", 1500.0),
+    ("Onion", "Bowenpally", "Hyderabad", "2024-01-01", 900.0),
+]
+
+
+def test_series_sorted_per_commodity_and_market():
+    store = PriceStore(_frame(ROWS))
+    series = store.series("TOMATO", "Bowenpally")
+    assert list(series.prices) == [1100.0, 1200.0]
+    assert series.last_date == pd.Timestamp("2024-01-02")
+    assert sorted(store.markets("tomato")) == ["Bowenpally", "Jainath"]
+    assert store.series("Tomato", "Nowhere") is None
+
+
+def test_repeated_date_keeps_last_row():
+    store = PriceStore(_frame(ROWS + [("Tomato", "Jainath", "Adilabad", "2024-01-01", 1550.0)]))
+    assert list(store.series("Tomato", "Jainath").prices) == [1550.0]
+
+
+def test_best_mandi_and_price_on():
+    store = PriceStore(_frame(ROWS))
+    assert store.best_mandi("Tomato") == ("Jainath", 1500.0)
+    assert store.price_on("Tomato", "Bowenpally", "2024-01-01") == 1100.0
+    assert store.price_on("Tomato", "Bowenpally", "2023-12-31") is None
+    with pytest.raises(ValueError):
+        store.best_mandi("Mango")
+
+
+# ---------- incremental updates ----------
+def test_apply_delta_skips_redelivered_rows_and_adds_new_series():
+    store = PriceStore(_frame(ROWS))
+    changed = store.apply_delta(_frame([
+        ("Tomato", "Bowenpally", "Hyderabad", "2024-01-02", 9999.0),  # already seen
+        ("Tomato", "Bowenpally", "Hyderabad", "2024-01-03", 1300.0),
+        ("Onion", "Jainath", "Adilabad", "2024-01-03", 800.0),
+    ]))
+    assert changed == {("tomato", "Bowenpally"), ("onion", "Jainath")}
+    assert list(store.series("Tomato", "Bowenpally").prices) == [1100.0, 1200.0, 1300.0]
+    assert "Jainath" in store.markets("Onion")
+    assert store.apply_delta(_frame(ROWS)) == set()
+
+
+HEADER = "Commodity,Market,District,Price Date,Modal Price\n"
+
+
+def _line(market, date, price):
+    return f"Tomato,{market},Hyderabad,{date},{price}\n"
+
+
+def _touch(path, bump):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+@pytest.fixture
+def agent3():
+    mod = pytest.importorskip("agent3")
+    clear_price_stores()
+    yield mod
+    clear_price_stores()
+
+
+def test_csv_delta_waits_for_complete_lines(tmp_path, agent3):
+    csv = tmp_path / "prices.csv"
+    csv.write_text(HEADER + _line("Bowenpally", "01-01-2024", 1100))
+    cursor = agent3._csv_cursor(str(csv))
+
+    with open(csv, "a") as f:
+        f.write("Tomato,Bowenpally,Hyder")
+    df, same = agent3.load_csv_delta(str(csv), cursor)
+    assert df.empty and same == cursor
+
+    with open(csv, "a") as f:
+        f.write("abad,02-01-2024,1200\n")
+    df, moved = agent3.load_csv_delta(str(csv), cursor)
+    assert list(df["Modal Price"]) == [1200.0]
+    assert moved[0] == os.path.getsize(csv)
+
+
+def test_rewritten_csv_falls_back_to_full_reload(tmp_path, agent3):
+    csv = tmp_path / "prices.csv"
+    csv.write_text(HEADER + _line("Bowenpally", "01-01-2024", 1100))
+    load = lambda path: get_price_store(
+        path, loader=agent3.load_and_clean_data,
+        delta_loader=agent3.load_csv_delta, cursor=agent3._csv_cursor,
+    )
+    first = load(str(csv))
+
+    csv.write_text(HEADER + _line("Jainath", "01-01-2024", 1500) + _line("Jainath", "02-01-2024", 1600))
+    _touch(csv, 1_000_000)
+    assert agent3.load_csv_delta(str(csv), first.cursor) is None
+
+    second = load(str(csv))
+    assert second is not first
+    assert second.markets("Tomato") == ["Jainath"]
+
+
+def test_failed_merge_leaves_cursor_and_mtime(tmp_path):
+    csv = tmp_path / "prices.csv"
+    csv.write_text("x\n")
+    good = _frame(ROWS)
+    clear_price_stores()
+    try:
+        store = get_price_store(str(csv), loader=lambda path: good, cursor=lambda path: 0)
+        mtime = store.mtime
+
+        def broken(path, cursor):
+            return pd.DataFrame({"Commodity": ["Tomato"]}), cursor + 1
+
+        _touch(csv, 1_000_000)
+        with pytest.raises(KeyError):
+            get_price_store(str(csv), delta_loader=broken)
+        assert (store.cursor, store.mtime) == (0, mtime)
+
+        delta = lambda path, cursor: (_frame([("Tomato", "Jainath", "Adilabad", "2024-01-02", 1600.0)]), cursor + 1)
+        assert get_price_store(str(csv), delta_loader=delta) is store
+        assert store.cursor == 1 and store.mtime != mtime
+        assert store.series("Tomato", "Jainath").last_price == 1600.0
+    finally:
+        clear_price_stores()
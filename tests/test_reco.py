@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pipeline = pytest.importorskip("pipeline")
+
+from advice_i18n import LANGUAGES, get_templates
+from reco import check_batch_parity, recommendation_agent
+
+LIVE = {
+    "agent1": {"field_label": "Crop", "confidence": 0.9, "weed_percentage": 5, "crop_stage": "Vegetative"},
+    "agent2": {"health_status": "Healthy", "confidence": 0.9, "probabilities": {}},
+    "agent3": {"crop": "Tomato", "best_mandi": "Bowenpally", "current_price": 1400.0,
+               "predicted_price": 1500.0, "recommendation": "WAIT – Prices likely to increase"},
+    "weather": {"source": "live", "temperature": 28, "humidity": 50, "rain": False,
+                "description": "clear sky"},
+}
+
+# Advice that tells the farmer all is well / when to sell needs real data behind it
+POSITIVE = {
+    "agent2": [("advice", "healthy"), ("decision", "healthy")],
+    "agent3": [("decision", "wait"), ("decision", "sell")],
+}
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_fallbacks_never_give_positive_advice(language):
+    templates = get_templates(language)
+    for n in range(1, len(LIVE) + 1):
+        for failed in itertools.combinations(LIVE, n):
+            outputs = {
+                name: pipeline.fallback_output(name, "Tomato") if name in failed else LIVE[name]
+                for name in LIVE
+            }
+            out = recommendation_agent(
+                outputs["agent1"], outputs["agent2"], outputs["agent3"], outputs["weather"],
+                language=language,
+            )
+            for name in failed:
+                for section, key in POSITIVE.get(name, []):
+                    text = templates[section][key].render({})
+                    if section == "advice":
+                        assert text not in out["detailed_advice"], (failed, key)
+                    else:
+                        assert text not in out["final_recommendation"], (failed, key)
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_batch_matches_single(language):
+    assert check_batch_parity(n=2000, language=language)["ok"]
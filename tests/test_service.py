@@ -0,0 +1,96 @@
+import base64
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+service = pytest.importorskip("service")
+
+from fastapi.testclient import TestClient
+
+from microbatch import DeadlineExceededError, QueueFullError
+
+AGENT1 = {"field_label": "Crop", "confidence": 0.9, "weed_percentage": 5, "crop_stage": "Vegetative"}
+AGENT2 = {"health_status": "Healthy", "confidence": 0.9, "probabilities": {}}
+
+
+class FakeBatcher:
+    def __init__(self, result=None, error=None):
+        self.result, self.error = result, error
+
+    async def submit(self, item, timeout=None):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _agent3(crop, district=None, top_k=5):
+    if crop != "Tomato":
+        raise ValueError("No data found for crop")
+    return {"crop": crop, "best_mandi": "Bowenpally", "current_price": 1400.0,
+            "predicted_price": 1500.0, "recommendation": "WAIT – Prices likely to increase"}
+
+
+def _decode(image):
+    if image == b"bad":
+        raise OSError("cannot identify image file")
+    return image
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No `with`: the lifespan would warm up the real models
+    monkeypatch.setattr(service, "run_agent3", _agent3)
+    monkeypatch.setattr(service, "OPENWEATHER_API_KEY", None)
+    monkeypatch.setitem(service.batchers, "agent1", FakeBatcher(AGENT1))
+    monkeypatch.setitem(service.batchers, "agent2", FakeBatcher(AGENT2))
+    monkeypatch.setitem(service._decoders, "agent1", _decode)
+    monkeypatch.setitem(service._decoders, "agent2", _decode)
+    return TestClient(service.app)
+
+
+def _advisory(**overrides):
+    body = {"crop": "Tomato", "city": "Hyderabad",
+            "field_image": base64.b64encode(b"field").decode(),
+            "leaf_image": base64.b64encode(b"leaf").decode()}
+    return {**body, **overrides}
+
+
+def test_agent3_errors(client):
+    assert client.get("/agent3", params={"crop": "Tomato"}).status_code == 200
+    assert client.get("/agent3", params={"crop": "Mango"}).status_code == 404
+    assert client.get("/agent3", params={"crop": "Tomato", "top_k": 0}).status_code == 422
+
+
+def test_image_errors(client, monkeypatch):
+    assert client.post("/agent1", content=b"field").json() == AGENT1
+    assert client.post("/agent1", content=b"").status_code == 400
+    assert client.post("/agent1", content=b"bad").status_code == 400
+
+    monkeypatch.setitem(service.batchers, "agent1", FakeBatcher(error=QueueFullError("full")))
+    resp = client.post("/agent1", content=b"field")
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+
+    monkeypatch.setitem(service.batchers, "agent2", FakeBatcher(error=DeadlineExceededError("late")))
+    assert client.post("/agent2", content=b"leaf").status_code == 504
+
+
+def test_unknown_language_is_rejected(client):
+    assert client.post("/advisory", json=_advisory(language="Klingon")).status_code == 422
+    body = {"agent1": AGENT1, "agent2": AGENT2, "agent3": _agent3("Tomato"),
+            "weather": {}, "language": "Klingon"}
+    assert client.post("/recommendation", json=body).status_code == 422
+
+
+def test_advisory_falls_back_per_agent(client, monkeypatch):
+    monkeypatch.setitem(service.batchers, "agent2", FakeBatcher(error=DeadlineExceededError("late")))
+    resp = client.post("/advisory", json=_advisory(crop="Mango"))
+    assert resp.status_code == 200
+    out = resp.json()
+    assert out["agent1"] == AGENT1
+    assert set(out["errors"]) == {"agent2", "agent3"}
+    assert "final" in out
+
+    monkeypatch.setitem(service.batchers, "agent1", FakeBatcher(error=QueueFullError("full")))
+    assert client.post("/advisory", json=_advisory()).status_code == 503
+    assert client.post("/advisory", json=_advisory(field_image="!!")).status_code == 400
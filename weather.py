@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# -------------------------------------------------
+# CONFIG
+# -------------------------------------------------
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+WEATHER_TTL = 600          # serve fresh for 10 minutes
+WEATHER_STALE_TTL = 3600   # then serve stale (and refresh) for up to 1 hour
+WEATHER_CACHE_SIZE = 2048
+
+
+def offline_weather(error):
+    return {
+        "temperature": None,
+        "humidity": None,
+        "rain": False,
+        "wind_speed": None,
+        "description": "Unavailable",
+        "source": "offline",
+        "error": str(error)
+    }
+
+
+# -------------------------------------------------
+# BACKENDS
+# -------------------------------------------------
+class OpenWeatherBackend:
+    """OpenWeather current-weather API over one pooled HTTP session."""
+
+    def __init__(self, url=OPENWEATHER_URL, timeout=10, pool_size=16):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, city, api_key, units):
+        params = {
+            "q": city,
+            "appid": api_key,
+            "units": units
+        }
+        response = self.session.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()  # catches 401, 403, 404
+
+        data = response.json()
+
+        return {
+            "temperature": data["main"]["temp"],
+            "humidity": data["main"]["humidity"],
+            "rain": "rain" in data,
+            "wind_speed": data["wind"]["speed"],
+            "description": data["weather"][0]["description"],
+            "source": "live"
+        }
+
+
+class StubWeatherBackend:
+    """Canned weather for tests and offline development (no network)."""
+
+    def __init__(self, readings=None, default=None):
+        self.readings = {k.lower(): v for k, v in (readings or {}).items()}
+        self.default = default or {
+            "temperature": 30.0,
+            "humidity": 60,
+            "rain": False,
+            "wind_speed": 2.0,
+            "description": "clear sky",
+        }
+        self.calls = 0
+
+    def fetch(self, city, api_key, units):
+        self.calls += 1
+        reading = self.readings.get(city.lower(), self.default)
+        return {**reading, "source": "live"}
+
+
+# -------------------------------------------------
+# PROVIDER (TTL cache + stale-while-revalidate)
+# -------------------------------------------------
+class WeatherProvider:
+    """
+    Weather lookups cached per (city, units).
+
+    Entries younger than `ttl` are served directly. Entries up to
+    `ttl + stale_ttl` old are served immediately while one background
+    refresh runs. Older or missing entries are fetched synchronously;
+    concurrent misses for the same key share one upstream call.
+    Failures are never cached.
+    """
+
+    def __init__(self, backend=None, ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL,
+                 max_entries=WEATHER_CACHE_SIZE):
+        self.backend = backend or OpenWeatherBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._inflight = {}  # key → Future of the fetch other misses wait on
+        self._lock = threading.Lock()
+        self.hits = 0      # fresh or stale entry served
+        self.misses = 0
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather")
+
+    def get(self, city, api_key, units="metric"):
+        key = (city.strip().lower(), units)
+        now = time.monotonic()
+
+        stale = False
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and now - hit[0] < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                stale = now - hit[0] >= self.ttl
+            else:
+                hit = None
+                self.misses += 1
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._inflight[key] = Future()
+
+        if hit is not None:
+            if stale:
+                self._refresh_in_background(key, city, api_key, units)
+            return dict(hit[1])
+
+        if leader:
+            try:
+                future.set_result(self._fetch(key, city, api_key, units))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        try:
+            return dict(future.result())
+        except Exception as e:
+            return offline_weather(e)
+
+    def _fetch(self, key, city, api_key, units):
+        value = self.backend.fetch(city, api_key, units)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _refresh_in_background(self, key, city, api_key, units):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, city, api_key, units)
+            except Exception:
+                pass  # keep serving the stale value
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_weather_provider():
+    """Process-wide WeatherProvider (shared session and cache)."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = WeatherProvider()
+    return _provider
+
+
+def set_weather_provider(provider):
+    """Swap the shared provider, e.g. for a StubWeatherBackend in tests."""
+    global _provider
+    _provider = provider